@@ -3,16 +3,12 @@ from io import BytesIO
 from PIL import Image
 from dash import html, dcc, register_page, callback
 import dash_mantine_components as dmc
-from google.cloud import storage, secretmanager
-from apps.utils import access_secrets
+from apps.utils import access_secrets, read_blob_bytes
 register_page(__name__)
 
 BUCKET_NAME = access_secrets("dashapp-375513", "BUCKET_NAME", "latest")
 
-storage_client = storage.Client()
-bucket = storage_client.bucket(BUCKET_NAME)
-blob = bucket.blob('NORDclose.jpg')
-img = Image.open(BytesIO(blob.download_as_bytes()))
+img = Image.open(BytesIO(read_blob_bytes(BUCKET_NAME, 'NORDclose.jpg')))
 
 layout = dmc.Container([
     dmc.Group([
@@ -0,0 +1,71 @@
+"""
+The segmentation page's 3D cluster figure, encoded once per worker and served as JSON.
+
+Parsing the figure blob and JSON-encoding its point arrays are the slow
+parts, and the result only depends on the resolution. Each resolution is
+encoded once per worker and served by a Flask route with an ETag. The page
+fetches it clientside, so Dash never re-serializes the figure when the
+resolution is toggled or the page is viewed again.
+"""
+import os
+import json
+import hashlib
+from functools import lru_cache
+import plotly.io as pio
+from flask import Response, abort, request
+from apps.utils import access_secrets, read_blob_bytes
+from apps.figures import decimate_figure
+
+CLUSTERS_ROUTE = "/clusters"
+
+# Total points drawn in the default view; the full cloud is shown on demand
+MAX_POINTS = int(os.environ.get("SEGMENTATION_MAX_POINTS", 2000))
+
+RESOLUTIONS = {'decimated': False, 'full': True}
+
+
+@lru_cache(maxsize=2)
+def cluster_figure(full_resolution: bool = False) -> dict:
+    """
+    The 3D cluster figure as a plain dict, parsed once per worker on first use.
+    """
+    if full_resolution:
+        # Looked up here, not at import: main.py imports this module before prefetching secrets
+        bucket_name = access_secrets("dashapp-375513", "BUCKET_NAME", "latest")
+        figure = pio.from_json(json.loads(read_blob_bytes(bucket_name, 'clusters_3d.json')))
+        return figure.to_plotly_json()
+    return decimate_figure(cluster_figure(True), MAX_POINTS)
+
+
+@lru_cache(maxsize=2)
+def cluster_figure_json(full_resolution: bool = False) -> tuple:
+    """
+    ETag and JSON bytes of the cluster figure, encoded once per worker.
+    """
+    body = pio.to_json(cluster_figure(full_resolution), validate=False).encode('utf-8')
+    return hashlib.sha1(body).hexdigest(), body
+
+
+def cluster_figure_url(resolution: str) -> str:
+    return f"{CLUSTERS_ROUTE}/{resolution}.json"
+
+
+def serve_cluster_figure(resolution: str) -> Response:
+    """
+    Flask view returning the encoded figure for `resolution` with its ETag.
+    """
+    if resolution not in RESOLUTIONS:
+        abort(404)
+    etag, body = cluster_figure_json(RESOLUTIONS[resolution])
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Revalidated on every view; an unchanged figure costs a 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
+def register_clusters_route(server) -> None:
+    """
+    Serve the encoded cluster figures from CLUSTERS_ROUTE on the app's Flask server.
+    """
+    server.add_url_rule(f"{CLUSTERS_ROUTE}/<resolution>.json", 'cluster_figure', serve_cluster_figure)
@@ -0,0 +1,251 @@
+"""
+Numeric helpers behind the Plotly figures on the pages.
+
+These work on plain arrays and figure dicts so they can be cached and
+tested without a running Dash app.
+"""
+import numpy as np
+from scipy.signal import fftconvolve
+
+# ---------------------------------------------------------------------
+# Level of detail
+# ---------------------------------------------------------------------
+
+def _take(value, n_points: int, index: np.ndarray):
+    """
+    Subset `value` to `index` when it holds one entry per point, recursing into dicts.
+    """
+    if isinstance(value, dict):
+        return {key: _take(val, n_points, index) for key, val in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)) and len(value) == n_points:
+        return np.asarray(value, dtype=object if isinstance(value, (list, tuple)) else None)[index]
+    return value
+
+
+def decimate_figure(figure: dict, max_points: int, seed: int = 0) -> dict:
+    """
+    Reduce a scatter figure to roughly `max_points` points in total.
+
+    Each trace keeps a share of the budget proportional to its size, so small
+    clusters stay visible, and points are drawn uniformly at random (with a
+    fixed seed, so the view is stable between requests). Every per-point array
+    on the trace (coordinates, text, marker colors and sizes, customdata) is
+    subset with the same indices.
+
+    Args:
+    ---
+    figure: dict - figure as returned by `go.Figure.to_plotly_json()`
+    max_points: int - total number of points to keep across all traces
+    seed: int - seed for the point sample
+
+    Returns:
+    ---
+    dict - a new figure dict, `figure` is left unchanged
+    """
+    traces = figure.get('data', [])
+    sizes = [len(trace.get('x', [])) for trace in traces]
+    total = sum(sizes)
+    if total <= max_points:
+        return figure
+    rng = np.random.default_rng(seed)
+    data = []
+    for trace, n_points in zip(traces, sizes):
+        keep = int(np.ceil(n_points * max_points / total))
+        if n_points <= keep:
+            data.append(trace)
+            continue
+        index = np.sort(rng.choice(n_points, size=keep, replace=False))
+        data.append(_take(trace, n_points, index))
+    return {**figure, 'data': data}
+
+
+# ---------------------------------------------------------------------
+# Calendar heatmap
+# ---------------------------------------------------------------------
+
+def _weekday(days: np.ndarray) -> np.ndarray:
+    """
+    Monday=0 weekday of datetime64[D] values (1970-01-01 was a Thursday).
+    """
+    return (days.astype('int64') + 3) % 7
+
+
+def calendar_counts(dates: np.ndarray, end, days: int) -> dict:
+    """
+    Daily counts laid out as a week x weekday calendar ending on `end`.
+
+    The window starts on the first Monday on or after `end - days`, so week
+    columns always run Monday to Sunday. Counting is a single `bincount` over
+    day offsets, so the cost is linear in rows plus days in the window.
+
+    Args:
+    ---
+    dates: np.ndarray - one date per event, NaT values are ignored
+    end: date - last day of the window
+    days: int - window length in days
+
+    Returns:
+    ---
+    dict - per-day arrays `week` (from 1), `weekday` (Monday=0), `count` and
+        `date` (ISO strings), plus month tick labels `month_text` and
+        positions `month_week`
+    """
+    end = np.datetime64(end, 'D')
+    start = end - np.timedelta64(days, 'D')
+    start = start + np.timedelta64(int(-_weekday(start) % 7), 'D')
+    n_days = max(int((end - start).astype('int64')) + 1, 0)
+
+    offsets = (np.asarray(dates, dtype='datetime64[D]') - start).astype('int64')
+    offsets = offsets[(offsets >= 0) & (offsets < n_days)]
+    counts = np.bincount(offsets, minlength=n_days)
+
+    day = np.arange(n_days)
+    week = day // 7 + 1
+    calendar = start + day.astype('timedelta64[D]')
+
+    # Months label the mean week of their days
+    months, month_index = np.unique(calendar.astype('datetime64[M]'), return_inverse=True)
+    month_week = np.bincount(month_index, weights=week) / np.bincount(month_index)
+    month_format = '%B' if days <= 366 else '%b %Y'
+    month_text = [month.item().strftime(month_format) for month in months]
+
+    return {
+        'week': week,
+        'weekday': day % 7,
+        'count': counts,
+        'date': np.datetime_as_string(calendar, unit='D'),
+        'month_text': month_text,
+        'month_week': month_week,
+    }
+
+
+# ---------------------------------------------------------------------
+# Kernel density
+# ---------------------------------------------------------------------
+
+# Grid points per bandwidth, and bounds on the binning grid size
+KDE_BINS_PER_BANDWIDTH = 16
+KDE_MIN_GRID = 512
+KDE_MAX_GRID = 2 ** 16
+
+
+def binned_kde(values: np.ndarray, n_points: int = 100) -> tuple:
+    """
+    Gaussian KDE evaluated at `n_points` evenly spaced points from min to max.
+
+    Matches `scipy.stats.gaussian_kde` with Scott's bandwidth, but the values are
+    linearly binned onto a fixed-size grid and convolved with the kernel by FFT,
+    so the cost after binning does not depend on the number of values.
+    Degenerate inputs (a single distinct value) get a bandwidth of 1% of
+    the value's magnitude instead of raising.
+
+    Args:
+    ---
+    values: np.ndarray - samples; NaN and infinite values are ignored
+    n_points: int - number of evaluation points
+
+    Returns:
+    ---
+    tuple - (x, density) arrays, both empty when there are no finite values
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.array([]), np.array([])
+    lo, hi = values.min(), values.max()
+    n = len(values)
+    bandwidth = values.std(ddof=1) * n ** (-1 / 5) if n > 1 else 0.0
+    if not bandwidth > 0:
+        bandwidth = max(abs(lo) * 0.01, 1.0)
+        lo, hi = lo - 3 * bandwidth, hi + 3 * bandwidth
+    x = np.linspace(lo, hi, n_points)
+
+    grid_size = int(np.clip(KDE_BINS_PER_BANDWIDTH * (hi - lo) / bandwidth, KDE_MIN_GRID, KDE_MAX_GRID))
+    step = (hi - lo) / (grid_size - 1)
+    # Linear binning: each value splits its weight between the two nearest grid points
+    position = (values - lo) / step
+    left = np.minimum(position.astype(np.int64), grid_size - 2)
+    right_weight = position - left
+    counts = (
+        np.bincount(left, weights=1 - right_weight, minlength=grid_size)
+        + np.bincount(left + 1, weights=right_weight, minlength=grid_size)
+    )
+
+    half_width = min(int(np.ceil(4 * bandwidth / step)), grid_size - 1)
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    density = fftconvolve(counts, kernel, mode='same') / n
+    grid = lo + np.arange(grid_size) * step
+    return x, np.interp(x, grid, np.clip(density, 0, None))
+
+
+# ---------------------------------------------------------------------
+# Pre-aggregated distributions
+# ---------------------------------------------------------------------
+
+# Outlier points drawn per box at most, evenly spread over the sorted outliers
+MAX_BOX_OUTLIERS = 200
+
+
+def histogram_bins(values: np.ndarray, size: float) -> dict:
+    """
+    Counts of `values` in bins of width `size` aligned to multiples of `size`.
+
+    Bins are closed on the left like Plotly's `xbins`, and only non-empty bins
+    are returned, so the output size is bounded by the value range, not the
+    number of values.
+
+    Args:
+    ---
+    values: np.ndarray - samples; NaN and infinite values are ignored
+    size: float - bin width
+
+    Returns:
+    ---
+    dict - `x` bin centres and `count` per non-empty bin
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {'x': np.array([]), 'count': np.array([], dtype=np.int64)}
+    index = np.floor(values / size).astype(np.int64)
+    first = index.min()
+    counts = np.bincount(index - first)
+    occupied = np.flatnonzero(counts)
+    return {'x': (occupied + first + 0.5) * size, 'count': counts[occupied]}
+
+
+def box_stats(values: np.ndarray) -> dict:
+    """
+    Box-plot statistics as Plotly computes them from raw points.
+
+    Quartiles use linear interpolation, whiskers end at the most extreme
+    values within 1.5 IQR of the box, and values beyond them are outliers.
+
+    Args:
+    ---
+    values: np.ndarray - samples; NaN and infinite values are ignored
+
+    Returns:
+    ---
+    dict - `q1`, `median`, `q3`, `lowerfence`, `upperfence` and up to
+        MAX_BOX_OUTLIERS `outliers`, or None when there are no finite values
+    """
+    values = np.sort(np.asarray(values, dtype=float))
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    outliers = values[(values < inside[0]) | (values > inside[-1])]
+    if len(outliers) > MAX_BOX_OUTLIERS:
+        outliers = outliers[np.linspace(0, len(outliers) - 1, MAX_BOX_OUTLIERS).round().astype(int)]
+    return {
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': inside[0],
+        'upperfence': inside[-1],
+        'outliers': outliers,
+    }
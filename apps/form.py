@@ -6,14 +6,14 @@ import dash_daq as daq
 import dash
 import dash_mantine_components as dmc
 from dash import dcc, html, Input, Output, State, ctx, callback
-from google.cloud import bigquery
 from pydantic import ValidationError
 from dash_pydantic_form import AccordionFormLayout, FormSection, ModelForm, fields, get_model_cls, ids
 from data_utils.datamodel import Application, application_form_fields
 from apps.utils import (
     access_secrets,
     upload_options_to_gcs)
-from data_utils.upload_to_bq import upsert_data_to_bigQuery_table
+from data_utils.applications import load_applications, get_application
+from data_utils.write_queue import get_write_queue, save_application, delete_application, next_application_id
 from data_utils.datamodel import Application, form_fields
 AIO_ID = "application-form"
 FORM_ID = "Form"
@@ -27,6 +27,9 @@ BUCKET_NAME = access_secrets(
     "BUCKET_NAME",
     "latest")
 
+# Seconds between refreshes of the queued-writes status
+WRITE_STATUS_INTERVAL = 2
+
 # Layout of the app
 form_layout = dmc.Container(
     children = [
@@ -95,8 +98,11 @@ form_layout = dmc.Container(
             ],
             type='default'
         ),
+        html.Div(id="write-queue-status", className="mt-3", style={'opacity': 0.5}),
+        dcc.Interval(id="write-queue-interval", interval=WRITE_STATUS_INTERVAL * 1000),
         dmc.Space(h=40),
         dcc.Store(id="current-application-store", data=None),
+        dcc.Store(id="write-queue-committed", data=None),
         dmc.Modal(
             title="Login",
             children=[
@@ -190,13 +196,11 @@ def update_bigquery(submit_n_clicks,
             except ValidationError as pydantic_err:
                 return pydantic_err, False, None
             
-            job = upsert_data_to_bigQuery_table(form_app)
-            job.result()
-            errors = job.errors
-
-            if errors == [] or errors is None:
+            # BigQuery is written by the write queue worker, not in this request
+            # The reload shows queued edits too, so the dropdown is current either way
+            if save_application(form_app) is None:
                 return f"Application {form_app.application_id} submitted successfully.", False, 1
-            return f"Encountered errors while inserting rows in Bigquery: {errors}", False, None
+            return f"Application {form_app.application_id} saved, committing to BigQuery.", False, 1
         else:
             return "Opening login modal", True, None
     elif button_id == 'login-button':
@@ -219,23 +223,24 @@ def update_bigquery(submit_n_clicks,
 )
 def load_data(n_clicks):
     """
-    Load the data from BigQuery and return the options for the dropdown
+    Load the applications from the cached table and return the options for the dropdown
 
     Store data in a hidden div to be used later
     """
     print(n_clicks)
     if n_clicks is None:
         return dash.no_update, dash.no_update, dash.no_update
-    client = bigquery.Client()
-    query = """
-        SELECT
-            application_id,
-            company_name,
-            job_title
-        FROM `dashapp-375513.data_science_job_hunt.applications`
-        ORDER BY company_name
-    """
-    dff = client.query_and_wait(query).to_dataframe()
+    dff = load_applications()[['application_id', 'company_name', 'job_title']].sort_values('company_name')
+    # Show queued edits that the worker has not committed yet
+    pending = get_write_queue().pending()
+    if pending:
+        dff = dff[~dff['application_id'].isin(list(pending))]
+        queued = pd.DataFrame(
+            [{'application_id': i, 'company_name': app.company_name, 'job_title': app.job_title}
+             for i, app in pending.items() if app is not None],
+            columns=['application_id', 'company_name', 'job_title'],
+        )
+        dff = pd.concat([dff, queued], ignore_index=True).sort_values('company_name')
     if dff.empty:
         return "No data available.", [], None
     dff[['application_id', 'company_name', 'job_title']] = dff[['application_id', 'company_name', 'job_title']].fillna('').astype(str)
@@ -258,34 +263,26 @@ def load_application(edit_clicks, new_clicks, application_id, raw_data):
         return dash.no_update
     triggered_id = ctx.triggered_id
     if triggered_id == 'new-button':
-        dff = pd.DataFrame(raw_data)
-        dff['application_id'] = dff['application_id'].astype(int)
-        new_id = dff['application_id'].max() + 1
-        new_app = Application(application_id = str(new_id), company_name = 'Enter Company Name', job_title = 'Job Title')
+        # Not from the cached dropdown data, which may miss ids another instance added
+        new_app = Application(application_id = next_application_id(), company_name = 'Enter Company Name', job_title = 'Job Title')
         form = ModelForm(item=new_app, aio_id=AIO_ID, form_id=FORM_ID, form_layout=form_fields, store_progress="session")
         return form, 'New application created successfully.'
     
     elif triggered_id == 'load-application-button':
-        # Load the record form bigquery where application_id = application_id store it as an Application object
-
-        client = bigquery.Client()
-        query = f"""
-        SELECT * FROM `dashapp-375513.data_science_job_hunt.applications` WHERE application_id = '{application_id}'
-        """
-        query_job = client.query(query)  # API request
-        rows = query_job.result()
-        
-        # store the data in a tuple
-        row = list(rows)[0]
-        row = dict(row)
-        row['core_skills'] = [row['core_skills']['list'][i]['element'] for i in range(len(row['core_skills']['list']))]
+        if not application_id:
+            return dash.no_update, 'Select an application to edit.'
+        pending = get_write_queue().pending()
+        if application_id in pending:
+            if pending[application_id] is None:
+                return dash.no_update, f'Application {application_id} is being deleted.'
+            form = ModelForm(item=pending[application_id], aio_id=AIO_ID, form_id=FORM_ID, form_layout=form_fields, store_progress="session")
+            return form, 'Application loaded from queued edits.'
 
-        row.values()
-
-        # Remove the created_at and updated_at fields
-        row.pop('created_at')
-        row.pop('updated_at')
-        form = ModelForm(item=Application(**row), aio_id=AIO_ID, form_id=FORM_ID, form_layout=form_fields, store_progress="session")
+        # Served from the dashboard's cached table; the backend is only queried on a miss
+        application = get_application(application_id)
+        if application is None:
+            return dash.no_update, f'Application {application_id} not found.'
+        form = ModelForm(item=application, aio_id=AIO_ID, form_id=FORM_ID, form_layout=form_fields, store_progress="session")
         return form, 'Application loaded successfully.'
 
 
@@ -320,21 +317,37 @@ def handle_delete_modal(delete_clicks, delete_confirmed_clicks, is_open, applica
         if button_id == "delete-button":
             return True, dash.no_update, False, None
         elif button_id == "delete-confirmed":
-            client = bigquery.Client()
-            query = f"""
-            DELETE FROM `dashapp-375513.data_science_job_hunt.applications` WHERE application_id = '{application_id}'
-            """
-            query_job = client.query(query)  # API request
-            query_job.result() # Wait for the job to complete
-            errors = query_job.errors
-            if errors == [] or errors is None:
+            if delete_application(application_id) is None:
                 return False, f"Application {application_id} deleted successfully.", False, 1
-            else:
-                return False, f"Encountered errors while deleting rows in Bigquery: {errors}", False, None
+            return False, f"Application {application_id} deleted, committing to BigQuery.", False, 1
         return is_open, dash.no_update, False, None
     else:
         return False, "Authentication failed", True, None
 
+# Callback to show queued writes and reload the dropdown once they are committed
+@callback(
+    Output("write-queue-status", "children"),
+    Output("write-queue-committed", "data"),
+    Output("load-button", "n_clicks", allow_duplicate=True),
+    Input("write-queue-interval", "n_intervals"),
+    State("write-queue-committed", "data"),
+    prevent_initial_call=True
+)
+def show_write_queue_status(n_intervals, last_committed):
+    """
+    Report pending and committed writes, and reload the current data after each commit.
+    """
+    status = get_write_queue().status()
+    if status['pending'] and status['last_error']:
+        message = f"{status['pending']} edits waiting for BigQuery, retrying: {status['last_error']}"
+    elif status['pending']:
+        message = f"{status['pending']} edits waiting for BigQuery."
+    else:
+        message = "All edits committed to BigQuery." if status['committed'] else ""
+    reload = 1 if last_committed is not None and status['last_committed'] != last_committed else dash.no_update
+    return message, status['last_committed'], reload
+
+
 # Callback to add core skills to the list in the dropdown
 @callback(
     Output("core-skills-dropdown", "options"),
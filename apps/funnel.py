@@ -0,0 +1,109 @@
+"""
+Single-pass aggregation of the application funnel.
+
+Each application's boolean stage flags are packed into one small integer
+(bit i set when FUNNEL_FLAGS[i] is true) and counted with one `np.bincount`.
+Every sankey link and headline metric is then a sum over the 2**7 possible
+flag combinations, so the cost over the frame is one pass no matter how many
+counts are derived from it.
+"""
+import numpy as np
+import pandas as pd
+
+FUNNEL_FLAGS = [
+    'refferal',
+    'recruiter',
+    'recruiter_screen',
+    'hiring_manager_screen',
+    'technical_screen',
+    'offer',
+    'rejection',
+]
+BITS = {flag: 1 << i for i, flag in enumerate(FUNNEL_FLAGS)}
+CODES = np.arange(1 << len(FUNNEL_FLAGS))
+
+# Sankey node labels, indexed by the link source/target below
+FUNNEL_NODES = [
+    'Cold Application', # 0
+    'Network Refferal', # 1
+    'Recruiter Initiated', # 2
+    'Recruiter Screen', # 3
+    'Hiring Manager Screen', # 4
+    'Technical Screen', # 5
+    'No Response', # 6
+    'Rejection', # 7
+    'Offer', # 8
+]
+
+# (source, target, flags that must be set, flags that must be clear)
+FUNNEL_LINKS = [
+    (0, 3, ['recruiter_screen'], ['refferal', 'recruiter']),
+    (0, 6, [], ['refferal', 'recruiter', 'recruiter_screen', 'rejection']),
+    (0, 7, ['rejection'], ['refferal', 'recruiter']),
+    (1, 3, ['refferal', 'recruiter_screen'], []),
+    (1, 6, ['refferal'], ['recruiter_screen', 'rejection']),
+    (1, 7, ['refferal', 'rejection'], []),
+    (2, 3, ['recruiter', 'recruiter_screen'], []),
+    (2, 6, ['recruiter'], ['recruiter_screen', 'rejection']),
+    (2, 7, ['recruiter', 'rejection'], []),
+    (3, 4, ['recruiter_screen', 'hiring_manager_screen'], []),
+    (3, 6, ['recruiter_screen'], ['hiring_manager_screen', 'rejection']),
+    (3, 7, ['recruiter_screen', 'rejection'], ['hiring_manager_screen']),
+    (4, 5, ['hiring_manager_screen', 'technical_screen'], []),
+    (4, 6, ['hiring_manager_screen'], ['technical_screen', 'rejection']),
+    (4, 7, ['hiring_manager_screen', 'rejection'], ['technical_screen']),
+    (5, 6, ['technical_screen'], ['offer', 'rejection']),
+    (5, 7, ['technical_screen', 'rejection'], ['offer']),
+    (5, 8, ['technical_screen', 'offer'], []),
+]
+
+
+def stage_counts(data: pd.DataFrame) -> np.ndarray:
+    """
+    Count applications per combination of FUNNEL_FLAGS in one pass.
+
+    Missing flags count as False.
+
+    Returns:
+    ---
+    np.ndarray - 128 counts indexed by the packed flag code
+    """
+    codes = np.zeros(len(data), dtype=np.uint8)
+    for flag, bit in BITS.items():
+        codes |= data[flag].eq(1).to_numpy(dtype=bool, na_value=False).astype(np.uint8) * np.uint8(bit)
+    return np.bincount(codes, minlength=len(CODES))
+
+
+def count(counts: np.ndarray, on: list = (), off: list = ()) -> int:
+    """
+    Number of applications with every flag in `on` set and every flag in `off` clear.
+    """
+    on_bits = sum(BITS[flag] for flag in on)
+    off_bits = sum(BITS[flag] for flag in off)
+    selected = ((CODES & on_bits) == on_bits) & ((CODES & off_bits) == 0)
+    return int(counts[selected].sum())
+
+
+def funnel_links(counts: np.ndarray) -> dict:
+    """
+    Sankey link sources, targets and values for FUNNEL_LINKS.
+    """
+    return {
+        'source': [link[0] for link in FUNNEL_LINKS],
+        'target': [link[1] for link in FUNNEL_LINKS],
+        'value': [count(counts, on, off) for _, _, on, off in FUNNEL_LINKS],
+    }
+
+
+def funnel_metrics(counts: np.ndarray) -> dict:
+    """
+    Headline counts for the dashboard.
+
+    Responses are recruiter screens plus rejections that came without a screen.
+    """
+    return {
+        'applications': int(counts.sum()),
+        'rejections': count(counts, on=['rejection']),
+        'responses': count(counts, on=['recruiter_screen']) + count(counts, on=['rejection'], off=['recruiter_screen']),
+        'offers': count(counts, on=['offer']),
+    }
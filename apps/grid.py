@@ -0,0 +1,272 @@
+"""
+Server-side row model for the applications AG Grid.
+
+The grid runs with `rowModelType="infinite"` and asks for one block of rows
+at a time through `getRowsRequest`. The functions here apply the grid's sort
+and filter models to the cached applications frame and return just the
+requested block, so the browser never holds more than a few blocks of rows.
+
+Only the filters declared on each column in `apps.tables.JOBcolumnDefs` are
+honoured.
+
+Filtered frames are shared between the grid and every chart callback through
+dataset handles: a content hash of the filter model, the search query and the
+data version that resolves to one cached frame per worker.
+"""
+import json
+import hashlib
+from typing import Callable
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from apps.tables import JOBcolumnDefs
+from data_utils.cache import LRUCache
+from data_utils.term_index import term_index
+from data_utils.text import search_keywords
+
+# field -> filter type declared in JOBcolumnDefs, e.g. 'agTextColumnFilter'
+COLUMN_FILTERS = {
+    col['field']: col.get('filter')
+    for group in JOBcolumnDefs
+    for col in group['children']
+}
+
+# ---------------------------------------------------------------------
+# Filtering
+# ---------------------------------------------------------------------
+
+def _is_list(values: pd.Series) -> bool:
+    return isinstance(values.dtype, pd.ArrowDtype) and pa.types.is_list(values.dtype.pyarrow_dtype)
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    """
+    Cell text as shown in the grid: list cells joined with ', ', missing values as ''.
+    """
+    if _is_list(values):
+        values = pd.Series(pc.binary_join(pa.array(values), ', '), index=values.index, dtype=pd.ArrowDtype(pa.string()))
+    return values.astype(str).where(values.notna(), '')
+
+
+def _text_condition(values: pd.Series, condition: dict) -> pd.Series:
+    kind = condition.get('type')
+    if kind == 'blank':
+        return _as_text(values) == ''
+    if kind == 'notBlank':
+        return _as_text(values) != ''
+    values = _as_text(values).str.lower()
+    target = str(condition.get('filter') or '').lower()
+    if kind == 'contains':
+        return values.str.contains(target, regex=False)
+    if kind == 'notContains':
+        return ~values.str.contains(target, regex=False)
+    if kind == 'equals':
+        return values == target
+    if kind == 'notEqual':
+        return values != target
+    if kind == 'startsWith':
+        return values.str.startswith(target)
+    if kind == 'endsWith':
+        return values.str.endswith(target)
+    raise ValueError(f"Unsupported text filter type: {kind}")
+
+
+def _compare(values: pd.Series, condition: dict, target, target_to) -> pd.Series:
+    kind = condition.get('type')
+    if kind == 'blank':
+        return values.isna()
+    if kind == 'notBlank':
+        return values.notna()
+    if kind == 'equals':
+        return values == target
+    if kind == 'notEqual':
+        return values != target
+    if kind == 'greaterThan':
+        return values > target
+    if kind == 'greaterThanOrEqual':
+        return values >= target
+    if kind == 'lessThan':
+        return values < target
+    if kind == 'lessThanOrEqual':
+        return values <= target
+    if kind == 'inRange':
+        return (values >= target) & (values <= target_to)
+    raise ValueError(f"Unsupported filter type: {kind}")
+
+
+def _number_condition(values: pd.Series, condition: dict) -> pd.Series:
+    values = pd.to_numeric(values, errors='coerce')
+    return _compare(values, condition, condition.get('filter'), condition.get('filterTo'))
+
+
+def _date_condition(values: pd.Series, condition: dict) -> pd.Series:
+    values = pd.to_datetime(values, errors='coerce').dt.normalize()
+    target = pd.to_datetime(condition.get('dateFrom'))
+    target_to = pd.to_datetime(condition.get('dateTo'))
+    return _compare(values, condition, target, target_to)
+
+
+CONDITIONS = {
+    'agTextColumnFilter': _text_condition,
+    'agNumberColumnFilter': _number_condition,
+    'agDateColumnFilter': _date_condition,
+}
+
+
+def column_mask(values: pd.Series, filter_type: str, model: dict) -> pd.Series:
+    """
+    Boolean mask for one column's entry in an AG Grid filter model.
+
+    Handles both single conditions and combined conditions
+    (`operator` with `conditions`, or the older `condition1`/`condition2`).
+    """
+    condition = CONDITIONS[filter_type]
+    if 'operator' in model:
+        conditions = model.get('conditions') or [model[key] for key in ('condition1', 'condition2') if key in model]
+        masks = [condition(values, c) for c in conditions]
+        mask = masks[0]
+        for other in masks[1:]:
+            mask = (mask & other) if model['operator'] == 'AND' else (mask | other)
+        return mask
+    return condition(values, model)
+
+
+def apply_filter_model(dff: pd.DataFrame, filter_model: dict) -> pd.DataFrame:
+    """
+    Filter the frame with an AG Grid filter model.
+
+    Args:
+    ---
+    dff: pd.DataFrame - rows to filter
+    filter_model: dict - the grid's `filterModel`, keyed by column field
+
+    Returns:
+    ---
+    pd.DataFrame - the rows passing every column filter
+    """
+    if not filter_model:
+        return dff
+    mask = pd.Series(True, index=dff.index)
+    for field, model in filter_model.items():
+        filter_type = COLUMN_FILTERS.get(field)
+        if filter_type not in CONDITIONS or field not in dff.columns:
+            continue
+        mask &= column_mask(dff[field], filter_type, model).fillna(False).astype(bool)
+    return dff[mask]
+
+
+def apply_search(dff: pd.DataFrame, query: str) -> pd.DataFrame:
+    """
+    Keep the rows matching a full-text `query`, best BM25 match first.
+
+    A query without keywords (empty, or only stopwords) does not filter.
+    """
+    if not query or not search_keywords(query):
+        return dff
+    ids = term_index.search(query)
+    rank = pd.Series(range(len(ids)), index=ids)
+    ranks = dff['application_id'].map(rank)
+    return dff.loc[ranks.dropna().sort_values(kind='stable').index]
+
+
+# ---------------------------------------------------------------------
+# Sorting and paging
+# ---------------------------------------------------------------------
+
+def apply_sort_model(dff: pd.DataFrame, sort_model: list) -> pd.DataFrame:
+    """
+    Sort the frame with an AG Grid sort model (a list of `colId`/`sort` pairs).
+    """
+    sort_model = [s for s in sort_model or [] if s['colId'] in dff.columns]
+    if not sort_model:
+        return dff
+    return dff.sort_values(
+        by=[s['colId'] for s in sort_model],
+        ascending=[s['sort'] == 'asc' for s in sort_model],
+        kind='stable',
+        na_position='last',
+        # Arrow list columns have no ordering; sort them by their text
+        key=lambda values: _as_text(values).where(values.notna()) if _is_list(values) else values,
+    )
+
+
+def get_rows(dff: pd.DataFrame, request: dict, load_text: Callable[[list], pd.DataFrame] = None) -> dict:
+    """
+    Answer an infinite row model `getRowsRequest` from the frame.
+
+    Args:
+    ---
+    dff: pd.DataFrame - the rows passing the request's filterModel (see `resolve_dataset`)
+    request: dict - the grid's request with startRow, endRow and sortModel
+    load_text: callable - returns the long text columns of a list of application ids, indexed
+        by application_id; only the rows of the requested block are looked up
+
+    Returns:
+    ---
+    dict - `getRowsResponse` with the requested block and the filtered row count
+    """
+    dff = apply_sort_model(dff, request.get('sortModel'))
+    block = dff.iloc[request.get('startRow', 0):request.get('endRow', len(dff))]
+    if load_text is not None and not block.empty:
+        text = load_text(block['application_id'].tolist())
+        block = block.drop(columns=text.columns, errors='ignore').join(text, on='application_id')
+    return {
+        'rowData': block.to_dict('records'),
+        'rowCount': len(dff),
+    }
+
+
+# ---------------------------------------------------------------------
+# Dataset handles
+# ---------------------------------------------------------------------
+
+# Filtered frames keyed by dataset handle, shared by every callback in the worker
+DATASETS = LRUCache(maxsize=32)
+
+
+def dataset_handle(filter_model: dict, version: str, search: str = None) -> dict:
+    """
+    Handle naming the rows that pass `filter_model` and `search` in one version of the data.
+
+    Equal filter states hash to the same key and so to the same cached frame.
+    The filter model and search query travel with the key so any worker can
+    rebuild the frame on a miss.
+
+    Args:
+    ---
+    filter_model: dict - the grid's `filterModel`
+    version: str - version of the applications data the filter applies to
+    search: str - full-text query from the search box, if any
+
+    Returns:
+    ---
+    dict - JSON-serialisable handle with `key`, `filterModel`, `search` and `version`
+    """
+    filter_model = filter_model or {}
+    search = (search or '').strip()
+    state = json.dumps({'filterModel': filter_model, 'search': search, 'version': version}, sort_keys=True, default=str)
+    return {
+        'key': hashlib.sha1(state.encode('utf-8')).hexdigest(),
+        'filterModel': filter_model,
+        'search': search,
+        'version': version,
+    }
+
+
+def filter_dataset(dff: pd.DataFrame, handle: dict) -> pd.DataFrame:
+    """
+    Apply a handle's filter model and search query to the frame.
+    """
+    return apply_search(apply_filter_model(dff, handle['filterModel']), handle.get('search'))
+
+
+def resolve_dataset(handle: dict, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    The cached frame for a dataset handle, filtering `load()` on a miss.
+
+    The frame is shared between callbacks and must not be modified in place.
+    """
+    return DATASETS.get_or_set(
+        handle['key'],
+        lambda: filter_dataset(load(), handle).reset_index(drop=True),
+    )
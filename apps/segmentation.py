@@ -1,24 +1,10 @@
-import json
-from dash import html, dcc, register_page, callback
-import plotly.io as pio
+from dash import html, dcc, register_page, clientside_callback, Input, Output
 import dash_mantine_components as dmc
-from google.cloud import storage, secretmanager
-from apps.utils import access_secrets
+from apps.clusters import cluster_figure_url
 
 register_page(__name__)
 
 
-BUCKET_NAME = access_secrets("dashapp-375513", "BUCKET_NAME", "latest")
-
-storage_client = storage.Client()
-bucket = storage_client.bucket(BUCKET_NAME)
-
-
-blob_name = f'clusters_3d.json'
-blob = bucket.blob(blob_name)
-with blob.open('r') as outfile:
-    cluster3d = pio.from_json(json.load(outfile))
-
 # Dummy page to get started.
 layout = dmc.Container(
     children=[
@@ -34,13 +20,29 @@ layout = dmc.Container(
 
             This may be an interesting tool for me to understand the market, though unlikely to be useful for job hunting.
             It will test my ability to compentently use NLP and clustering techniques.
-            
+
             ---
             """,
             className='card-text',
         ),
-        dcc.Graph(figure=cluster3d),
+        dmc.Switch(id='cluster-full-resolution', label='Show every point', checked=False),
+        dcc.Loading(dcc.Graph(id='cluster-3d'), type='default'),
         html.Br(),
     ],
     fluid=True
-)
\ No newline at end of file
+)
+
+
+# The figure is fetched pre-encoded from the clusters route instead of being
+# serialized by a server callback on every toggle and page view
+clientside_callback(
+    f"""
+    async function(fullResolution) {{
+        const url = fullResolution ? '{cluster_figure_url('full')}' : '{cluster_figure_url('decimated')}';
+        const response = await fetch(url);
+        return await response.json();
+    }}
+    """,
+    Output('cluster-3d', 'figure'),
+    Input('cluster-full-resolution', 'checked'),
+)
@@ -18,9 +18,10 @@ JOBcolumnDefs =[
         {'headerName': 'Job Title', 'field': 'job_title', 'filter': 'agTextColumnFilter', 'minWidth': 200},
         {'headerName': 'Location', 'field': 'location', 'filter': 'agTextColumnFilter'},
         {'headerName': 'In-Office?', 'field': 'office_participation', 'filter': 'agTextColumnFilter'},
-        {'headerName': 'Role', 'field': 'role_desc', 'filter': 'agTextColumnFilter', 'minWidth': 300},
-        {'headerName': 'Responsibilities', 'field': 'responsibilities', 'filter': 'agTextColumnFilter', 'minWidth': 300},
-        {'headerName': 'Requirements', 'field': 'requirements', 'filter': 'agTextColumnFilter', 'minWidth': 300},
+        # Long text is fetched per block of rows (see `apps.grid.get_rows`), so it cannot be filtered or sorted
+        {'headerName': 'Role', 'field': 'role_desc', 'filter': False, 'sortable': False, 'minWidth': 300},
+        {'headerName': 'Responsibilities', 'field': 'responsibilities', 'filter': False, 'sortable': False, 'minWidth': 300},
+        {'headerName': 'Requirements', 'field': 'requirements', 'filter': False, 'sortable': False, 'minWidth': 300},
         {'headerName': 'Pay Min', 'field': 'pay_min', 'filter': 'agNumberColumnFilter', 'cellStyle': {'textAlign': 'center'}, 'headerClass': 'center-aligned-header'},
         {'headerName': 'Pay Max', 'field': 'pay_max', 'filter': 'agNumberColumnFilter', 'cellStyle': {'textAlign': 'center'}, 'headerClass': 'center-aligned-header'},
     ]},
@@ -64,11 +65,11 @@ column_size_options={
 get_row_style = {
     "styleConditions": [
         {
-            "condition": "params.data.rejection == 1",
+            "condition": "params.data && params.data.rejection == 1",
             "style": {"backgroundColor": "rgba(240, 128, 128, 0.3)"},
         },
         {
-            "condition": "params.data.hiring_manager_screen == 1",
+            "condition": "params.data && params.data.hiring_manager_screen == 1",
             "style": {"backgroundColor": "rgba(0, 203, 166, 0.3)"},
         },
     ],
@@ -2,10 +2,257 @@
 This module contains utility functions that are used across the app.
 """
 
+import os
 import json
+import time
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from google.cloud import secretmanager, storage, bigquery
 from google.cloud.exceptions import NotFound
 
+# ---------------------------------------------------------------------
+# Client Registry
+# ---------------------------------------------------------------------
+
+# Max pooled HTTP connections per client, sized for concurrent callbacks in a worker
+HTTP_POOL_SIZE = int(os.environ.get("GCP_HTTP_POOL_SIZE", 16))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Clients hold sockets and gRPC channels that must not be shared across a fork
+os.register_at_fork(after_in_child=_clients.clear)
+
+
+def _with_connection_pool(client):
+    """
+    Mount a larger connection pool on a client's authorized HTTP session.
+    """
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    client._http.mount("https://", adapter)
+    return client
+
+
+def _get_client(key, factory):
+    """
+    Return the client registered under `key`, creating it with `factory` on first use.
+    """
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+def get_storage_client() -> storage.Client:
+    """
+    Shared Cloud Storage client for this worker.
+    """
+    return _get_client("storage", lambda: _with_connection_pool(storage.Client()))
+
+
+def get_bigquery_client(project: str = None) -> bigquery.Client:
+    """
+    Shared BigQuery client for this worker, one per project.
+    """
+    return _get_client(("bigquery", project), lambda: _with_connection_pool(bigquery.Client(project=project)))
+
+
+def get_secret_client() -> secretmanager.SecretManagerServiceClient:
+    """
+    Shared Secret Manager client for this worker.
+    """
+    return _get_client("secretmanager", secretmanager.SecretManagerServiceClient)
+
+# ---------------------------------------------------------------------
+# Secrets
+# ---------------------------------------------------------------------
+
+# Secrets read by the pages at import, fetched together at boot by `prefetch_secrets`
+APP_SECRETS = ("BUCKET_NAME", "VALID_USERNAME_PASSWORD_PAIRS")
+
+# "gcp" reads Secret Manager; "local" reads environment variables named after
+# the secret, then the JSON object in SECRETS_FILE, for offline runs
+SECRETS_BACKEND = os.environ.get("SECRETS_BACKEND", "gcp")
+SECRETS_FILE = os.environ.get("SECRETS_FILE")
+
+# Seconds a fetched secret is served before it is fetched again
+SECRETS_REFRESH = float(os.environ.get("SECRETS_REFRESH", 3600))
+
+
+class SecretsProvider:
+    """
+    In-memory cache of secret payloads with a refresh interval.
+
+    Payloads are kept as strings keyed by (project_id, secret_id, version_id).
+    If a refresh fails the last good payload is served and the error logged.
+    """
+
+    def __init__(self, backend: str = SECRETS_BACKEND, refresh: float = SECRETS_REFRESH):
+        self.backend = backend
+        self.refresh = refresh
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def _fetch_gcp(self, project_id, secret_id, version_id) -> str:
+        name = f"projects/{project_id}/secrets/{secret_id}/versions/{version_id}"
+        response = get_secret_client().access_secret_version(request={"name": name})
+        return response.payload.data.decode("UTF-8")
+
+    def _fetch_local(self, project_id, secret_id, version_id) -> str:
+        if secret_id in os.environ:
+            return os.environ[secret_id]
+        if SECRETS_FILE:
+            with open(SECRETS_FILE, encoding='utf-8') as json_file:
+                secrets = json.load(json_file)
+            if secret_id in secrets:
+                value = secrets[secret_id]
+                return value if isinstance(value, str) else json.dumps(value)
+        raise KeyError(f"Secret {secret_id} not found in the environment or SECRETS_FILE")
+
+    def _fresh(self, key) -> bool:
+        cached = self._payloads.get(key)
+        return cached is not None and time.monotonic() - cached[0] < self.refresh
+
+    def _fetch(self, key) -> str:
+        fetch = self._fetch_local if self.backend == "local" else self._fetch_gcp
+        payload = fetch(*key)
+        with self._lock:
+            self._payloads[key] = (time.monotonic(), payload)
+        return payload
+
+    def get(self, project_id: str, secret_id: str, version_id: str = "latest") -> str:
+        """
+        Return the payload of a secret version, fetching it if missing or due for refresh.
+        """
+        key = (project_id, secret_id, version_id)
+        cached = self._payloads.get(key)
+        if self._fresh(key):
+            return cached[1]
+        try:
+            return self._fetch(key)
+        except Exception as err:
+            if cached is None:
+                raise
+            logging.warning(f"Failed to refresh secret {secret_id}, serving cached value: {err}")
+            return cached[1]
+
+    def prefetch(self, project_id: str, secret_ids: tuple, version_id: str = "latest") -> None:
+        """
+        Fetch several secrets concurrently and cache them; secrets cached within `refresh` are skipped.
+        """
+        keys = [(project_id, secret_id, version_id) for secret_id in secret_ids]
+        keys = [key for key in keys if not self._fresh(key)]
+        if not keys:
+            return
+        with ThreadPoolExecutor(max_workers=len(keys) or 1) as pool:
+            list(pool.map(self._fetch, keys))
+
+
+secrets_provider = SecretsProvider()
+
+
+def prefetch_secrets(project_id: str, secret_ids: tuple = APP_SECRETS, version_id: str = "latest") -> None:
+    """
+    Warm the secrets cache at boot so page imports are served from memory.
+    """
+    secrets_provider.prefetch(project_id, secret_ids, version_id)
+
+# ---------------------------------------------------------------------
+# GCS Blob Cache
+# ---------------------------------------------------------------------
+
+# Blobs the pages read while they are imported, downloaded together by `prefetch_blobs`
+STARTUP_BLOBS = (
+    "clusters_3d.json",
+    "NORDclose.jpg",
+    "resume.txt",
+    "core_skills_list.json",
+    "application_source_list.json",
+)
+
+# On-disk copies of downloaded blobs; /tmp is the only writable path on App Engine
+BLOB_CACHE_DIR = os.environ.get("BLOB_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ds_dashboard_blobs"))
+
+# Seconds a cached blob is served without checking its generation in GCS
+BLOB_CACHE_MAX_AGE = float(os.environ.get("BLOB_CACHE_MAX_AGE", 3600))
+
+
+def _blob_cache_paths(bucket_name: str, blob_name: str) -> tuple:
+    path = os.path.join(BLOB_CACHE_DIR, bucket_name, blob_name)
+    return path, path + ".meta.json"
+
+
+def _write_blob_cache(bucket_name: str, blob_name: str, data: bytes, generation, etag) -> None:
+    path, meta_path = _blob_cache_paths(bucket_name, blob_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    meta = {"generation": generation, "etag": etag, "checked_at": time.time()}
+    # Write to temporary files and rename so concurrent readers never see partial content
+    for target, content in ((path, data), (meta_path, json.dumps(meta).encode())):
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp:
+            tmp.write(content)
+        os.replace(tmp.name, target)
+
+
+def read_blob_bytes(bucket_name: str, blob_name: str) -> bytes:
+    """
+    Read a blob through the on-disk cache.
+
+    A cached copy checked within BLOB_CACHE_MAX_AGE is returned without any
+    network call. Older copies are revalidated against the blob's generation
+    and only downloaded again when it changed. If GCS cannot be reached a
+    cached copy is served regardless of age.
+
+    Args:
+    bucket_name: str - name of the bucket to read from
+    blob_name: str - name of the blob to read
+
+    Returns:
+    bytes - the blob content
+    """
+    path, meta_path = _blob_cache_paths(bucket_name, blob_name)
+    meta = None
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as json_file:
+            meta = json.load(json_file)
+        if time.time() - meta["checked_at"] < BLOB_CACHE_MAX_AGE:
+            with open(path, "rb") as cached:
+                return cached.read()
+    try:
+        blob = get_storage_client().bucket(bucket_name).get_blob(blob_name)
+        if blob is None:
+            raise NotFound(f"gs://{bucket_name}/{blob_name}")
+        if meta is not None and meta["generation"] == blob.generation:
+            with open(path, "rb") as cached:
+                data = cached.read()
+        else:
+            data = blob.download_as_bytes(if_generation_match=blob.generation)
+            logging.info(f"Downloaded gs://{bucket_name}/{blob_name} generation {blob.generation}")
+    except NotFound:
+        raise
+    except Exception as err:
+        if meta is None:
+            raise
+        logging.warning(f"Could not revalidate gs://{bucket_name}/{blob_name}, serving cached copy: {err}")
+        with open(path, "rb") as cached:
+            return cached.read()
+    _write_blob_cache(bucket_name, blob_name, data, blob.generation, blob.etag)
+    return data
+
+
+def prefetch_blobs(bucket_name: str, blob_names: tuple = STARTUP_BLOBS) -> None:
+    """
+    Download (or revalidate) several blobs concurrently into the on-disk cache.
+    """
+    with ThreadPoolExecutor(max_workers=len(blob_names) or 1) as pool:
+        list(pool.map(lambda blob_name: read_blob_bytes(bucket_name, blob_name), blob_names))
+
 # ---------------------------------------------------------------------
 # Utility Functions
 # ---------------------------------------------------------------------
@@ -13,11 +260,11 @@ from google.cloud.exceptions import NotFound
 def access_secrets(project_id, secret_id, version_id, json_type=False):
     """
     Access the payload for the given secret version if one exists.
+
+    Payloads are served from `secrets_provider`, so repeated lookups of the
+    same secret do not go back to Secret Manager until the refresh interval.
     """
-    client = secretmanager.SecretManagerServiceClient()
-    name = f"projects/{project_id}/secrets/{secret_id}/versions/{version_id}"
-    response = client.access_secret_version(request={"name": name})
-    payload = response.payload.data.decode("UTF-8")
+    payload = secrets_provider.get(project_id, secret_id, version_id)
     if json_type:
         payload = json.loads(payload)
     return payload
@@ -27,10 +274,7 @@ def read_text_from_gcs(bucket_name: str, file_name: str) -> str:
     """
     Function to read the resume from Google Cloud Storage
     """
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(file_name)
-    text = blob.download_as_text()
+    text = read_blob_bytes(bucket_name, file_name).decode("utf-8")
     return text
 
 
@@ -38,7 +282,7 @@ def file_exists_in_gcs(bucket_name: str, blob_name: str)-> bool:
     """
     Check if a file exists in GCS
     """
-    storage_client = storage.Client()
+    storage_client = get_storage_client()
     bucket = storage_client.bucket(bucket_name)
     blob = bucket.blob(blob_name)
     return blob.exists()
@@ -48,10 +292,7 @@ def read_json_from_gcs(bucket_name: str, file_name: str) -> dict:
     """
     Function to read the resume from Google Cloud Storage
     """
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(file_name)
-    text = json.loads(blob.download_as_text())
+    text = json.loads(read_blob_bytes(bucket_name, file_name))
     return text
 
 
@@ -67,10 +308,13 @@ def upload_options_to_gcs(options: list, bucket_name: str, blob_name: str) -> bo
     Returns:
     bool - True if successful
     """
-    client = storage.Client()
+    client = get_storage_client()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(blob_name)
-    blob.upload_from_string(json.dumps(options), content_type='application/json')
+    data = json.dumps(options)
+    blob.upload_from_string(data, content_type='application/json')
+    # Keep the local cache in step so the new options are read back immediately
+    _write_blob_cache(bucket_name, blob_name, data.encode("utf-8"), blob.generation, blob.etag)
     return True
 
 
@@ -85,8 +329,5 @@ def read_options_from_gcs(bucket_name: str, blob_name: str) -> list:
     Returns:
     list - list of options used in dash dropdown
     """
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    options = json.loads(blob.download_as_text())
+    options = json.loads(read_blob_bytes(bucket_name, blob_name))
     return options
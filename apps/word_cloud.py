@@ -0,0 +1,130 @@
+"""
+Rendered word-cloud images, cached by content and served from a static URL.
+
+Rendering the 1000x500 WordCloud and PNG-encoding it is the slow part of the
+word cloud callback, and the image only depends on the top words and their
+counts. Images are kept in a bounded LRU keyed by a hash of that top-N
+frequency vector and served by a Flask route with an ETag, so the callback
+returns a short URL instead of an inline base64 payload and browsers reuse
+the image for repeated filters.
+
+A request for an image this worker does not hold (evicted, or served by
+another instance) is rebuilt from the grid filter model and search query
+carried in the URL.
+"""
+import os
+import json
+import base64
+import hashlib
+from collections import Counter
+from io import BytesIO
+from flask import Response, abort, request
+from wordcloud import WordCloud
+from apps.grid import filter_dataset
+from data_utils.applications import load_applications
+from data_utils.cache import LRUCache
+from data_utils.term_index import term_index
+
+WORDCLOUD_ROUTE = "/wordcloud"
+
+# Words drawn per image (WordCloud's max_words); only these enter the cache key
+TOP_WORDS = int(os.environ.get("WORDCLOUD_TOP_WORDS", 200))
+
+# Rendered PNGs keyed by the hash of their top-N frequency vector
+IMAGES = LRUCache(maxsize=int(os.environ.get("WORDCLOUD_CACHE_SIZE", 64)))
+
+
+def top_words(freq: Counter) -> list:
+    """
+    The (word, count) pairs WordCloud draws, most frequent first.
+    """
+    return sorted(freq.items(), key=lambda item: item[1], reverse=True)[:TOP_WORDS]
+
+
+def wordcloud_key(top: list) -> str:
+    return hashlib.sha1(json.dumps(top).encode('utf-8')).hexdigest()
+
+
+def plot_wordcloud(top: list):
+    wc = WordCloud(
+        background_color='white',
+        width=1000,
+        height=500,
+        max_words=TOP_WORDS,
+        # Fixed layout so a key always maps to the same image on every worker
+        random_state=0,
+    )
+    wc.fit_words(dict(top))
+    return wc.to_image()
+
+
+def render_png(top: list) -> bytes:
+    img = BytesIO()
+    plot_wordcloud(top).save(img, format='PNG')
+    return img.getvalue()
+
+
+def wordcloud_image(freq: Counter) -> tuple:
+    """
+    Key and PNG bytes of the word cloud for `freq`, rendering only on a cache miss.
+    """
+    top = top_words(freq)
+    key = wordcloud_key(top)
+    return key, IMAGES.get_or_set(key, lambda: render_png(top))
+
+
+def wordcloud_url(freq: Counter, handle: dict) -> str:
+    """
+    URL of the cached word cloud image for `freq`.
+
+    Args:
+    ---
+    freq: Counter - token frequencies of the filtered applications
+    handle: dict - dataset handle the frequencies were computed from
+
+    Returns:
+    ---
+    str - image URL, stable for equal top-N frequencies
+    """
+    key, _ = wordcloud_image(freq)
+    state = {'filterModel': handle.get('filterModel') or {}, 'search': handle.get('search') or ''}
+    dataset = base64.urlsafe_b64encode(json.dumps(state, sort_keys=True, default=str).encode('utf-8')).decode()
+    return f"{WORDCLOUD_ROUTE}/{key}.png?dataset={dataset}"
+
+
+def _rebuild(dataset: str) -> tuple:
+    state = json.loads(base64.urlsafe_b64decode(dataset.encode()))
+    if not isinstance(state, dict) or not isinstance(state.get('filterModel'), dict) \
+            or not isinstance(state.get('search', ''), str):
+        raise ValueError("dataset must encode a filter model")
+    dff = filter_dataset(load_applications(), state)
+    return wordcloud_image(term_index.frequencies(dff['application_id'].tolist(), fields=['requirements']))
+
+
+def serve_wordcloud(key: str) -> Response:
+    """
+    Flask view returning the PNG for `key` with its ETag.
+    """
+    png = IMAGES.get(key)
+    cache_control = 'public, max-age=31536000, immutable'
+    if png is None:
+        if not request.args.get('dataset'):
+            abort(404)
+        try:
+            rebuilt_key, png = _rebuild(request.args['dataset'])
+        except (ValueError, KeyError, TypeError):
+            abort(400)
+        if rebuilt_key != key:
+            # The data changed since the URL was issued: serve the current image uncached
+            key, cache_control = rebuilt_key, 'no-cache'
+    response = Response(png, mimetype='image/png')
+    response.set_etag(key)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+def register_wordcloud_route(server) -> None:
+    """
+    Serve cached word cloud images from WORDCLOUD_ROUTE on the app's Flask server.
+    """
+    server.add_url_rule(f"{WORDCLOUD_ROUTE}/<key>.png", 'wordcloud_png', serve_wordcloud)
@@ -0,0 +1,53 @@
+"""
+Funnel aggregation benchmark: one bincount pass vs one boolean mask per sankey link.
+
+Run from the repository root:
+
+    python benchmarks/bench_funnel.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.funnel import FUNNEL_LINKS, stage_counts, funnel_links
+from benchmarks.synthetic import synthetic_applications
+
+
+def mask_per_link(data):
+    """
+    The previous build_sankey approach: a full boolean filter for every link.
+    """
+    values = []
+    for _, _, on, off in FUNNEL_LINKS:
+        mask = True
+        for flag in on:
+            mask = mask & (data[flag] == 1)
+        for flag in off:
+            mask = mask & (data[flag] == 0)
+        values.append(data[mask]['application_id'].count())
+    return values
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f"{'rows':>10}{'masks ms':>12}{'bincount ms':>14}{'ns/row':>10}")
+    for n_rows in (10_000, 100_000, 1_000_000):
+        data = synthetic_applications(n_rows)
+        masks, expected = best_of(lambda: mask_per_link(data))
+        single, links = best_of(lambda: funnel_links(stage_counts(data)))
+        assert links['value'] == expected
+        print(f"{n_rows:>10}{masks * 1e3:>12.1f}{single * 1e3:>14.1f}{single / n_rows * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Pay KDE benchmark: binned FFT density vs scipy's gaussian_kde at 100 points.
+
+Run from the repository root:
+
+    python benchmarks/bench_kde.py
+"""
+import os
+import sys
+import time
+import numpy as np
+from scipy.stats import gaussian_kde
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.figures import binned_kde
+from benchmarks.synthetic import synthetic_applications
+
+
+def exact_kde(pay):
+    """
+    The previous pay_histogram approach: gaussian_kde evaluated on 100 points.
+    """
+    x_vals = np.linspace(min(pay), max(pay), 100)
+    return x_vals, gaussian_kde(pay)(x_vals)
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f"{'rows':>10}{'gaussian_kde ms':>17}{'binned ms':>12}{'max rel err':>14}")
+    for n_rows in (10_000, 100_000, 1_000_000):
+        data = synthetic_applications(n_rows)
+        pay = ((data['pay_min'] + data['pay_max']) / 2).to_numpy(dtype=float)
+        exact, (x_exact, y_exact) = best_of(lambda: exact_kde(pay), repeat=1 if n_rows > 100_000 else 3)
+        binned, (x_binned, y_binned) = best_of(lambda: binned_kde(pay, n_points=100))
+        assert np.allclose(x_exact, x_binned)
+        error = np.abs(y_binned - y_exact).max() / y_exact.max()
+        print(f"{n_rows:>10}{exact * 1e3:>17.1f}{binned * 1e3:>12.1f}{error:>14.2e}")
+
+
+if __name__ == "__main__":
+    main()
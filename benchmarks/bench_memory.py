@@ -0,0 +1,34 @@
+"""
+Applications table memory benchmark: untyped object columns vs `typed_applications`.
+
+Run from the repository root:
+
+    python benchmarks/bench_memory.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_utils.applications import typed_applications
+from benchmarks.synthetic import synthetic_records
+
+
+def megabytes(dff):
+    return dff.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def main():
+    print(f"{'rows':>10}{'object MB':>12}{'typed MB':>11}{'ratio':>8}{'cast ms':>10}")
+    for n_rows in (10_000, 100_000, 1_000_000):
+        records = synthetic_records(n_rows)
+        start = time.perf_counter()
+        typed = typed_applications(records)
+        cast = time.perf_counter() - start
+        before, after = megabytes(records), megabytes(typed)
+        print(f"{n_rows:>10}{before:>12.1f}{after:>11.1f}{before / after:>8.1f}{cast * 1e3:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Local storage backend benchmark: query latency of the DuckDB repository.
+
+Times the queries the dashboard and form make against a Parquet-backed
+DuckDB table of synthetic applications. Needs the duckdb package
+(`pip install .[local]`). Runs offline: secrets are read from the
+environment, with a placeholder bucket name the benchmark never reads.
+
+Run from the repository root:
+
+    python benchmarks/bench_repository.py
+"""
+import os
+import sys
+import time
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Point lookups build an Application, whose module reads BUCKET_NAME at import
+os.environ.setdefault("SECRETS_BACKEND", "local")
+os.environ.setdefault("BUCKET_NAME", "benchmark-bucket")
+
+from data_utils.applications import BOOL_COLUMNS
+from data_utils.repository import DuckDBApplications
+from benchmarks.synthetic import synthetic_records, synthetic_requirements
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f"{'rows':>10}{'full ms':>10}{'delta ms':>10}{'text ms':>10}{'point ms':>10}")
+    for n_rows in (1_000, 10_000, 100_000):
+        records = synthetic_records(n_rows)
+        records['requirements'] = synthetic_requirements(n_rows).astype(object)
+        records['role_desc'] = records['responsibilities'] = None
+        # Point lookups build an Application, so the rows must pass its validation
+        records[BOOL_COLUMNS] = records[BOOL_COLUMNS].astype('boolean').fillna(False)
+        records['technical_screen_type'] = 'Interview'
+        with tempfile.TemporaryDirectory() as directory:
+            repository = DuckDBApplications(os.path.join(directory, 'applications.parquet'))
+            repository.replace_rows(records)
+            since = records['updated_at'].max() - datetime.timedelta(days=1)
+            ids = records['application_id'].sample(100, random_state=0).tolist()
+            full, _ = best_of(repository.query_rows)
+            delta, _ = best_of(lambda: repository.query_rows(since=since))
+            text, _ = best_of(lambda: repository.query_text(ids))
+            point, _ = best_of(lambda: repository.query_application(ids[0]))
+        print(f"{n_rows:>10}{full * 1e3:>10.1f}{delta * 1e3:>10.2f}{text * 1e3:>10.2f}{point * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
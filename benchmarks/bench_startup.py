@@ -0,0 +1,106 @@
+"""
+Worker startup benchmark for the dashboard page.
+
+Each run starts a fresh interpreter, the way a gunicorn worker does, with
+the applications table served by the local DuckDB backend from a Parquet
+file of `--rows` synthetic applications, so no credentials or network are
+needed. Two phases are timed, both running the real code:
+
+* import     - `import apps.dashboard`, what a worker does before it can
+  serve anything; it must not touch the applications table
+* first view - the first `layout()` call plus `load_applications()`, the
+  work the first page view of a new worker pays for
+
+Needs the duckdb package (`pip install .[local]`). Run from the repository root:
+
+    python benchmarks/bench_startup.py --rows 10000 --repeat 5
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHILD = """
+import json, time
+from dash import Dash
+from data_utils import repository
+
+queries = 0
+query_rows = repository.DuckDBApplications.query_rows
+
+def counted_query_rows(self, *args, **kwargs):
+    global queries
+    queries += 1
+    return query_rows(self, *args, **kwargs)
+
+repository.DuckDBApplications.query_rows = counted_query_rows
+app = Dash(__name__, use_pages=True, pages_folder='')
+
+start = time.perf_counter()
+import apps.dashboard
+imported = time.perf_counter() - start
+import_queries = queries
+
+from data_utils.applications import load_applications
+start = time.perf_counter()
+apps.dashboard.layout()
+load_applications()
+first_view = time.perf_counter() - start
+print(json.dumps({'import': imported, 'first_view': first_view, 'import_queries': import_queries}))
+"""
+
+
+def write_table(path: str, n_rows: int) -> None:
+    """
+    Store `n_rows` synthetic applications in the Parquet file at `path`.
+    """
+    from data_utils.repository import DuckDBApplications
+    from benchmarks.synthetic import synthetic_records, synthetic_requirements
+    records = synthetic_records(n_rows)
+    records['requirements'] = synthetic_requirements(n_rows).astype(object)
+    records['role_desc'] = records['responsibilities'] = None
+    DuckDBApplications(path).replace_rows(records)
+
+
+def run(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="synthetic applications in the local table")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "applications.parquet")
+        write_table(path, args.rows)
+        env = {
+            **os.environ,
+            "APPLICATIONS_BACKEND": "duckdb",
+            "APPLICATIONS_PARQUET": path,
+            "APPLICATIONS_SYNC": "none",
+            "TERM_INDEX_PATH": os.path.join(directory, "terms.npz"),
+            "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])),
+        }
+        results = [run(env) for _ in range(args.repeat)]
+
+    print(f"{'rows':>10}{'import s':>10}{'view s':>10}{'queries at import':>20}")
+    print(
+        f"{args.rows:>10}{statistics.median(r['import'] for r in results):>10.3f}"
+        f"{statistics.median(r['first_view'] for r in results):>10.3f}"
+        f"{max(r['import_queries'] for r in results):>20}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Word-cloud tokenizer benchmark: regex backend vs NLTK `word_tokenize` on synthetic requirements.
+
+Run from the repository root:
+
+    python benchmarks/bench_tokenizer.py
+
+The last column is the share of texts whose token lists match exactly. When
+the punkt_tab model cannot be downloaded, the baseline splits sentences at
+the phrase boundaries of the synthetic texts instead (a period, question or
+exclamation mark before a capital) and runs NLTK's per-sentence tokenizer,
+which is what `word_tokenize` does after Punkt.
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nltk.tokenize import NLTKWordTokenizer
+from data_utils.text import STOPWORDS, regex_tokenize, nltk_tokenize
+from benchmarks.synthetic import synthetic_requirements
+
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"])')
+
+
+def phrase_nltk_tokenize(texts):
+    words = NLTKWordTokenizer()
+    return texts.map(lambda text: [
+        word
+        for sentence in SENTENCE_BOUNDARY.split(text)
+        for word in words.tokenize(sentence.lower())
+        if word.isalnum() and word not in STOPWORDS
+    ])
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    try:
+        nltk_tokenize(synthetic_requirements(1))
+        baseline = nltk_tokenize
+    except LookupError:
+        baseline = phrase_nltk_tokenize
+    print(f"{'texts':>10}{'nltk s':>10}{'regex s':>10}{'speedup':>10}{'same':>8}")
+    for n_rows in (1_000, 10_000, 100_000):
+        texts = synthetic_requirements(n_rows)
+        slow, expected = timed(lambda: baseline(texts))
+        fast, tokens = timed(lambda: regex_tokenize(texts))
+        same = sum(a == b for a, b in zip(tokens, expected)) / n_rows
+        print(f"{n_rows:>10}{slow:>10.2f}{fast:>10.2f}{slow / fast:>9.1f}x{same:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Synthetic applications data for the benchmarks.
+"""
+import datetime
+import numpy as np
+import pandas as pd
+
+FLAGS = [
+    'refferal',
+    'recruiter',
+    'recruiter_screen',
+    'hiring_manager_screen',
+    'technical_screen',
+    'offer',
+    'rejection',
+]
+
+
+def synthetic_applications(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A frame shaped like the applications table, with plausible funnel flags and pay ranges.
+    """
+    rng = np.random.default_rng(seed)
+    screen = rng.random(n_rows) < 0.2
+    hiring = screen & (rng.random(n_rows) < 0.5)
+    technical = hiring & (rng.random(n_rows) < 0.5)
+    offer = technical & (rng.random(n_rows) < 0.3)
+    pay_min = rng.normal(140000, 30000, n_rows).clip(60000).round(-3)
+    return pd.DataFrame({
+        'application_id': np.arange(n_rows).astype(str),
+        'application_date': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D'),
+        'company_name': rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella'], n_rows),
+        'office_participation': rng.choice(['Remote', 'Hybrid', 'On-site'], n_rows),
+        'pay_min': pay_min,
+        'pay_max': pay_min + rng.integers(0, 60, n_rows) * 1000,
+        'refferal': rng.random(n_rows) < 0.1,
+        'recruiter': rng.random(n_rows) < 0.1,
+        'recruiter_screen': screen,
+        'hiring_manager_screen': hiring,
+        'technical_screen': technical,
+        'offer': offer,
+        'rejection': ~offer & (rng.random(n_rows) < 0.4),
+    })
+
+
+REQUIREMENT_PHRASES = [
+    "5+ years of experience with Python, SQL and dbt.",
+    "Strong communication skills; you'll partner with product (and engineering) teams.",
+    "Experience building ML models in production, e.g. forecasting or ranking.",
+    "Familiarity with Spark/Databricks, Airflow & cloud data warehouses.",
+    "You can't be afraid of ambiguity -- we're a small team!",
+    "Bachelor's or Master's degree in Statistics, CS or a related field.",
+    "Comfortable with A/B testing, causal inference and experimentation.",
+    "Nice to have: \"Looker\" or Tableau dashboards, plus 1,000+ hours of stakeholder work?",
+]
+
+
+def synthetic_requirements(n_rows: int, seed: int = 0) -> pd.Series:
+    """
+    Requirement texts of 3 to 12 sentences drawn from typical job-posting phrases.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(3, 13, n_rows)
+    phrases = rng.integers(0, len(REQUIREMENT_PHRASES), lengths.sum())
+    texts = np.split(np.array(REQUIREMENT_PHRASES, dtype=object)[phrases], np.cumsum(lengths)[:-1])
+    return pd.Series([' '.join(text) for text in texts])
+
+
+SKILLS = ['python', 'sql', 'spark', 'dbt', 'airflow', 'tableau', 'pytorch', 'statistics', 'experimentation', 'forecasting']
+
+
+def synthetic_records(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Every non-text column of the applications table as untyped Python objects,
+    the way rows look after a `to_dict('records')` round trip.
+    """
+    rng = np.random.default_rng(seed)
+    data = synthetic_applications(n_rows, seed)
+    start = datetime.date(2025, 1, 1)
+
+    def maybe_dates(mask):
+        offsets = rng.integers(0, 365, n_rows)
+        return [start + datetime.timedelta(days=int(d)) if m else None for d, m in zip(offsets, mask)]
+
+    def flags(values):
+        # Object column of Python bools with some missing answers
+        values = pd.Series(values, dtype=object)
+        values[rng.random(n_rows) < 0.05] = None
+        return values
+
+    records = pd.DataFrame({
+        'application_id': data['application_id'].astype(object),
+        'application_date': [d.date() for d in data['application_date']],
+        'application_link': [f"https://jobs.example.com/{i}" for i in range(n_rows)],
+        'company_name': data['company_name'].astype(object),
+        'job_title': rng.choice(['Data Scientist', 'Senior Data Scientist', 'ML Engineer', 'Analyst'], n_rows).astype(object),
+        'location': rng.choice(['New York, NY', 'Remote', 'Austin, TX', 'Seattle, WA'], n_rows).astype(object),
+        'office_participation': data['office_participation'].astype(object),
+        'pay_min': data['pay_min'].astype(int).astype(object),
+        'pay_max': data['pay_max'].astype(int).astype(object),
+        'cv_version': rng.choice(['v1', 'v2', 'v3'], n_rows).astype(object),
+        'cover_letter': rng.choice(['yes', 'no'], n_rows).astype(object),
+        'self_assessment': rng.integers(1, 6, n_rows).astype(object),
+        'core_skills': [
+            {'list': [{'element': skill} for skill in rng.choice(SKILLS, rng.integers(1, 6), replace=False)]}
+            for _ in range(n_rows)
+        ],
+        'application_source': rng.choice(['LinkedIn', 'Referral', 'Company site', 'Recruiter'], n_rows).astype(object),
+        'technical_screen_type': rng.choice(['Take home', 'Live coding', 'Case study'], n_rows).astype(object),
+        'technical_screen_time': rng.integers(30, 240, n_rows).astype(object),
+        'created_at': list(pd.Timestamp('2025-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 10**7, n_rows), unit='s')),
+    })
+    for flag in ['llm', 'mmm', 'marketing', 'retail', 'healthcare', 'finance', 'senior_role', 'staff_role',
+                 'generalist_role', 'management_role']:
+        records[flag] = flags((rng.random(n_rows) < 0.2).tolist())
+    for flag in FLAGS:
+        records[flag] = flags(data[flag].tolist())
+    for flag in ['recruiter_screen', 'hiring_manager_screen', 'technical_screen', 'offer', 'rejection']:
+        records[f'{flag}_date'] = maybe_dates(data[flag])
+    records['updated_at'] = records['created_at']
+    return records
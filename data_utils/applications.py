@@ -0,0 +1,303 @@
+"""
+Read access to the applications table for the dashboard.
+
+The table is held in a process-wide TTL cache so every callback in a worker
+shares one scan of the storage backend (see `data_utils.repository`). After
+the first full load, refreshes only fetch rows changed since the last
+`updated_at` high-water mark. Writes (form submit/delete) call
+`invalidate_applications` so readers in the same process never see stale data
+after a write.
+
+Invalidation is per process. With several instances, a write served by one
+instance reaches the others after CACHE_TTL, or at once when the dashboard's
+Reload button invalidates their cache.
+
+The long free-text columns are left out of the cached table and fetched per
+application with `load_application_text` only when they are displayed.
+
+The cached table is held with compact types (see `typed_applications`), so
+every chart builder works from the same typed frame.
+"""
+import os
+import logging
+import datetime
+import threading
+from typing import TYPE_CHECKING
+import pandas as pd
+import pyarrow as pa
+from data_utils.cache import TTLCache, LRUCache
+from data_utils.repository import (
+    TEXT_COLUMNS, SCHEMA, APPLICATIONS_BACKEND, get_repository, skill_list, application_from_record
+)
+
+if TYPE_CHECKING:
+    from data_utils.datamodel import Application
+
+# Seconds a loaded copy of the table is served before re-querying
+CACHE_TTL = float(os.environ.get("APPLICATIONS_CACHE_TTL", 300))
+
+# Applications opened for editing, kept as validated models
+APPLICATION_CACHE_SIZE = int(os.environ.get("APPLICATION_CACHE_SIZE", 256))
+
+BOOL_COLUMNS = [field['name'] for field in SCHEMA if field['type'] == 'BOOL']
+DATE_COLUMNS = [field['name'] for field in SCHEMA if field['type'] == 'DATE']
+INT_COLUMNS = [field['name'] for field in SCHEMA if field['type'] == 'INT64']
+TIMESTAMP_COLUMNS = [field['name'] for field in SCHEMA if field['type'] == 'TIMESTAMP']
+
+# Low-cardinality string columns held as categoricals
+CATEGORY_COLUMNS = ['office_participation', 'application_source', 'technical_screen_type', 'cv_version']
+
+# Other short strings held as Arrow strings
+STRING_COLUMNS = [
+    field['name'] for field in SCHEMA
+    if field['type'] == 'STRING' and field['name'] not in TEXT_COLUMNS + CATEGORY_COLUMNS
+]
+
+SKILLS_DTYPE = pd.ArrowDtype(pa.list_(pa.string()))
+DATE_DTYPE = pd.ArrowDtype(pa.date32())
+
+
+def typed_applications(dff: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast the applications table to its compact in-memory types.
+
+    Flags become nullable `boolean`, integers `Int64`, dates Arrow `date32`
+    (serialised as plain ISO dates in the grid), timestamps UTC `datetime64`,
+    CATEGORY_COLUMNS `category`, other short strings Arrow strings and
+    `core_skills` an Arrow list of strings.
+    Columns that are missing or already typed are left as they are.
+
+    Args:
+    ---
+    dff: pd.DataFrame - rows as returned by the storage backend, or a previously typed frame
+
+    Returns:
+    ---
+    pd.DataFrame - a new frame with the typed columns
+    """
+    columns = {}
+    for col in dff.columns:
+        values = dff[col]
+        if col in BOOL_COLUMNS:
+            columns[col] = values.astype('boolean')
+        elif col in INT_COLUMNS:
+            columns[col] = values.astype('Int64')
+        elif col in DATE_COLUMNS and values.dtype != DATE_DTYPE:
+            columns[col] = pd.to_datetime(values).astype(DATE_DTYPE)
+        elif col in TIMESTAMP_COLUMNS:
+            columns[col] = pd.to_datetime(values, utc=True)
+        elif col in CATEGORY_COLUMNS:
+            columns[col] = values.astype('category')
+        elif col in STRING_COLUMNS:
+            columns[col] = values.astype('string[pyarrow]')
+        elif col == 'core_skills' and values.dtype != SKILLS_DTYPE:
+            columns[col] = pd.Series(
+                pa.array([skill_list(value) for value in values], type=pa.list_(pa.string())),
+                index=values.index, dtype=SKILLS_DTYPE,
+            )
+    return dff.assign(**columns)
+
+
+def query_applications(since: datetime.datetime = None, application_ids: list = None) -> pd.DataFrame:
+    """
+    Query rows of the applications table from the storage backend, without the TEXT_COLUMNS.
+
+    Args:
+    ---
+    since: datetime - only rows with a later `updated_at`
+    application_ids: list - only these applications
+
+    Returns:
+    ---
+    pd.DataFrame - the matching rows
+    """
+    return get_repository().query_rows(since=since, application_ids=application_ids)
+
+
+def query_application_ids() -> set:
+    """
+    Query the set of application ids currently in the table.
+
+    Only the id column is scanned, so this stays cheap as the table grows.
+    """
+    return get_repository().query_ids()
+
+
+def query_application_text(application_ids: list) -> pd.DataFrame:
+    """
+    Query the TEXT_COLUMNS for the given application ids.
+    """
+    return get_repository().query_text(list(application_ids))
+
+
+def merge_delta(dff: pd.DataFrame, delta: pd.DataFrame, current_ids: set) -> pd.DataFrame:
+    """
+    Merge changed rows into a cached copy of the table.
+
+    Rows in `delta` replace any cached row with the same application_id and
+    cached rows whose id is no longer in `current_ids` are dropped (deleted).
+
+    Args:
+    ---
+    dff: pd.DataFrame - previously loaded rows
+    delta: pd.DataFrame - rows inserted or updated since `dff` was loaded
+    current_ids: set - every application_id currently in the table
+
+    Returns:
+    ---
+    pd.DataFrame - the merged rows, newest applications first
+    """
+    if not delta.empty:
+        dff = dff[~dff['application_id'].isin(delta['application_id'])]
+        dff = pd.concat([dff, delta], ignore_index=True) if not dff.empty else delta
+    dff = dff[dff['application_id'].isin(current_ids)]
+    return dff.sort_values(by='application_date', ascending=False).reset_index(drop=True)
+
+
+class IncrementalApplications:
+    """
+    Keep an in-memory copy of the applications table up to date with delta loads.
+
+    The first refresh loads the whole table. Later refreshes only fetch rows
+    whose `updated_at` is past the high-water mark (less `lookback`, to cover
+    writers whose timestamp was stamped before a later write committed), and
+    reconcile deletions against the current set of ids. Ids present in the
+    table but missing from both the cache and the delta are fetched by id.
+    """
+
+    def __init__(self, lookback: datetime.timedelta = datetime.timedelta(minutes=10)):
+        self.lookback = lookback
+        self.dff = None
+        self.high_water_mark = None
+        self.version = None
+
+    def refresh(self) -> pd.DataFrame:
+        """
+        Bring the in-memory copy up to date and return it.
+        """
+        if self.dff is None or self.high_water_mark is None:
+            dff = query_applications()
+            dff = dff.sort_values(by='application_date', ascending=False).reset_index(drop=True)
+        else:
+            since = self.high_water_mark - self.lookback
+            delta = query_applications(since=since)
+            current_ids = query_application_ids()
+            missing = current_ids - set(self.dff['application_id']) - set(delta['application_id'])
+            if missing:
+                backfill = query_applications(application_ids=sorted(missing))
+                delta = pd.concat([delta, backfill], ignore_index=True) if not delta.empty else backfill
+            logging.info(f"Fetched {len(delta)} changed rows from {APPLICATIONS_BACKEND}")
+            # Typed before merging so the cached columns keep their dtypes through the concat
+            dff = merge_delta(self.dff, typed_applications(delta), current_ids)
+        dff = typed_applications(dff)
+        if not dff.empty:
+            self.high_water_mark = dff['updated_at'].max().to_pydatetime()
+        self.dff = dff
+        # Content hash of (id, updated_at), identical across workers holding the same rows
+        row_hashes = pd.util.hash_pandas_object(dff[['application_id', 'updated_at']], index=False)
+        self.version = f"{int(row_hashes.sum()):016x}"
+        logging.info(f"Holding {len(dff)} rows from {APPLICATIONS_BACKEND}")
+        return dff
+
+
+incremental_applications = IncrementalApplications()
+
+
+applications_cache = TTLCache(incremental_applications.refresh, ttl=CACHE_TTL)
+
+
+def load_applications() -> pd.DataFrame:
+    """
+    Return the cached applications table, fetching changes from the backend when it is stale.
+
+    The frame is shared between callers and must not be modified in place.
+    """
+    return applications_cache.get()
+
+
+def applications_version() -> str:
+    """
+    Version of the cached table, changing whenever a row is added, updated or removed.
+    """
+    load_applications()
+    return incremental_applications.version
+
+
+def invalidate_applications() -> None:
+    """
+    Mark the cached applications table stale after a write.
+    """
+    applications_cache.invalidate()
+
+
+# ---------------------------------------------------------------------
+# Lazily loaded text columns
+# ---------------------------------------------------------------------
+
+# application_id -> (updated_at, {column: text})
+_text_cache = {}
+_text_lock = threading.Lock()
+
+
+def load_application_text(application_ids: list) -> pd.DataFrame:
+    """
+    Return the TEXT_COLUMNS for the given applications, indexed by application_id.
+
+    Text is cached per application and re-queried only for ids that are not
+    cached yet or whose `updated_at` in the cached table has moved on.
+    """
+    versions = load_applications().set_index('application_id')['updated_at']
+    application_ids = [i for i in dict.fromkeys(application_ids) if i in versions.index]
+    with _text_lock:
+        stale = [i for i in application_ids if _text_cache.get(i, (None,))[0] != versions[i]]
+        if stale:
+            fetched = query_application_text(stale)
+            for row in fetched.to_dict('records'):
+                _text_cache[row['application_id']] = (
+                    row['updated_at'], {col: row[col] for col in TEXT_COLUMNS}
+                )
+        text = {i: _text_cache[i][1] for i in application_ids if i in _text_cache}
+    return pd.DataFrame.from_dict(text, orient='index', columns=TEXT_COLUMNS).rename_axis('application_id')
+
+
+# ---------------------------------------------------------------------
+# Single applications
+# ---------------------------------------------------------------------
+
+# application_id -> (updated_at, Application)
+applications_by_id = LRUCache(maxsize=APPLICATION_CACHE_SIZE)
+
+
+def get_application(application_id: str) -> "Application":
+    """
+    Return one application with every column, e.g. to open it in the form.
+
+    Served from memory in the common case: the short columns come from the
+    cached table and the TEXT_COLUMNS from the text cache. An entry is reused
+    while the application's `updated_at` in the cached table is unchanged.
+    Only an id missing from the cached table (written since the last refresh)
+    is looked up in the backend, with a parameterized point query.
+
+    Args:
+    ---
+    application_id: str - id of the application
+
+    Returns:
+    ---
+    Application - the stored application, or None if there is none
+    """
+    table = load_applications()
+    rows = table[table['application_id'] == application_id]
+    if rows.empty:
+        return get_repository().query_application(application_id)
+    record = rows.to_dict('records')[0]
+    cached = applications_by_id.get(application_id)
+    if cached is not None and cached[0] == record['updated_at']:
+        return cached[1]
+    text = load_application_text([application_id])
+    if application_id in text.index:
+        record.update(text.loc[application_id].to_dict())
+    record = {key: None if pd.api.types.is_scalar(value) and pd.isna(value) else value for key, value in record.items()}
+    application = application_from_record(record)
+    applications_by_id.set(application_id, (record['updated_at'], application))
+    return application
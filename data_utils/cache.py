@@ -0,0 +1,112 @@
+"""
+Small in-process caches shared by the dashboard and form callbacks.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+# ---------------------------------------------------------------------
+# TTL Cache
+# ---------------------------------------------------------------------
+
+class TTLCache:
+    """
+    Hold the result of `loader` for `ttl` seconds.
+
+    Refreshes are single-flight: when the value is missing or expired only one
+    thread runs `loader`, every other caller waits for that result instead of
+    issuing a duplicate query. `invalidate` marks the value stale so the next
+    `get` reloads it; a load that was already running when `invalidate` was
+    called is handed to its caller but not kept.
+
+    Args:
+    ---
+    loader: Callable - zero argument function returning the value to cache
+    ttl: float - seconds a loaded value stays fresh
+    """
+
+    def __init__(self, loader: Callable[[], Any], ttl: float):
+        self.loader = loader
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._refresh_lock = threading.Lock()
+
+    def _is_fresh(self) -> bool:
+        return time.monotonic() < self._expires_at
+
+    def get(self) -> Any:
+        """
+        Return the cached value, loading it first if missing or expired.
+        """
+        if self._is_fresh():
+            return self._value
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited on the lock
+            if self._is_fresh():
+                return self._value
+            generation = self._generation
+            value = self.loader()
+            if generation == self._generation:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+            return value
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached value so the next `get` reloads it.
+        """
+        self._generation += 1
+        self._expires_at = 0.0
+
+# ---------------------------------------------------------------------
+# LRU Cache
+# ---------------------------------------------------------------------
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used key.
+
+    Args:
+    ---
+    maxsize: int - number of entries kept
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, factory: Callable[[], Any]) -> Any:
+        """
+        Return the value for `key`, computing and storing it with `factory` on a miss.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
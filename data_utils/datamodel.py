@@ -13,16 +13,14 @@ def ensure_id(value: Any)-> str:
 
 BUCKET_NAME = access_secrets("dashapp-375513", "BUCKET_NAME", "latest")
 
-core_skills_list = read_options_from_gcs(BUCKET_NAME, "core_skills_list.json")
-app_source_list = read_options_from_gcs(BUCKET_NAME, "application_source_list.json")
-
-  
+# Options are read when the form is rendered, from the local blob cache, so
+# importing the model needs no GCS access and newly added options show up
 fields.Select.register_data_getter(
-    lambda: [{"label": i, "value": i} for i in core_skills_list],
+    lambda: [{"label": i, "value": i} for i in read_options_from_gcs(BUCKET_NAME, "core_skills_list.json")],
     "core_skills",
 )
 fields.Select.register_data_getter(
-    lambda: [{"label": i, "value": i} for i in app_source_list],
+    lambda: [{"label": i, "value": i} for i in read_options_from_gcs(BUCKET_NAME, "application_source_list.json")],
     "application_source_list",
 )
 
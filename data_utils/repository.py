@@ -0,0 +1,351 @@
+"""
+Storage backends for the applications table.
+
+Every read and write of the table goes through the repository selected with
+APPLICATIONS_BACKEND:
+
+- "bigquery" (default) queries and writes the BigQuery table.
+- "duckdb" holds the table in an embedded DuckDB database persisted to a
+  local Parquet file (APPLICATIONS_PARQUET). Queries run in memory without a
+  network round trip, so the app can run and be load-tested offline. Writes
+  are applied locally at once and BigQuery is kept in sync asynchronously by
+  the write queue (see `data_utils.write_queue`).
+
+Both backends store the columns of application_data_schema.json and read and
+write `Application` objects. Populate the local file from BigQuery with:
+
+    python -m data_utils.repository
+"""
+import os
+import json
+import logging
+import datetime
+import tempfile
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+from apps.utils import get_bigquery_client
+from data_utils.upload_to_bq import upsert_applications_to_bigQuery_table, delete_applications_from_bigQuery_table
+
+if TYPE_CHECKING:
+    from data_utils.datamodel import Application
+
+PROJECT_ID = "dashapp-375513"
+APPLICATIONS_TABLE = "dashapp-375513.data_science_job_hunt.applications"
+
+# Long free-text columns, fetched lazily instead of with the table
+TEXT_COLUMNS = ['role_desc', 'responsibilities', 'requirements']
+
+with open(os.path.join(os.path.dirname(__file__), "application_data_schema.json"), encoding='utf-8') as json_file:
+    SCHEMA = json.load(json_file)
+
+# "bigquery" or "duckdb"
+APPLICATIONS_BACKEND = os.environ.get("APPLICATIONS_BACKEND", "bigquery")
+
+# Parquet file the duckdb backend loads from and writes back to
+APPLICATIONS_PARQUET = os.environ.get(
+    "APPLICATIONS_PARQUET", os.path.join(tempfile.gettempdir(), "ds_dashboard_applications.parquet")
+)
+
+# Local column types for the BigQuery schema types; core_skills is a plain list of strings
+DUCKDB_TYPES = {
+    'STRING': 'VARCHAR',
+    'BOOL': 'BOOLEAN',
+    'INT64': 'BIGINT',
+    'DATE': 'DATE',
+    'TIMESTAMP': 'TIMESTAMPTZ',
+    'STRUCT': 'VARCHAR[]',
+}
+ARROW_SCHEMA = pa.schema([
+    (field['name'], {
+        'STRING': pa.string(),
+        'BOOL': pa.bool_(),
+        'INT64': pa.int64(),
+        'DATE': pa.date32(),
+        'TIMESTAMP': pa.timestamp('us', tz='UTC'),
+        'STRUCT': pa.list_(pa.string()),
+    }[field['type']])
+    for field in SCHEMA
+])
+
+
+def skill_list(value) -> list:
+    """
+    Skill names from a core_skills cell, either BigQuery's {'list': [{'element': ...}]} or a plain list.
+    """
+    if isinstance(value, dict):
+        value = value.get('list')
+    if value is None or isinstance(value, float):
+        return None
+    return [item['element'] if isinstance(item, dict) else item for item in value]
+
+
+def application_from_record(record: dict) -> "Application":
+    """
+    An Application from a stored row; NULL columns take the model defaults.
+    """
+    # Imported here: datamodel reads Secret Manager at import, which the
+    # table queries (and the offline benchmarks) do not need
+    from data_utils.datamodel import Application
+    record = {key: value for key, value in record.items() if key not in ('created_at', 'updated_at')}
+    record['core_skills'] = skill_list(record.get('core_skills'))
+    return Application(**{key: value for key, value in record.items() if value is not None})
+
+
+class BigQueryApplications:
+    """
+    The applications table in BigQuery.
+
+    Args:
+    ---
+    table: str - fully qualified table id
+    project: str - project the queries are billed to
+    """
+    local = False
+
+    def __init__(self, table: str = APPLICATIONS_TABLE, project: str = PROJECT_ID):
+        self.table = table
+        self.project = project
+
+    def _query(self, query: str, params: list = None):
+        client = get_bigquery_client(self.project)
+        job_config = bigquery.QueryJobConfig(query_parameters=params or [])
+        return client.query_and_wait(query, job_config=job_config)
+
+    def query_rows(self, since: datetime.datetime = None, application_ids: list = None,
+                   with_text: bool = False) -> pd.DataFrame:
+        """
+        Rows of the table, without the TEXT_COLUMNS unless `with_text`.
+
+        Args:
+        ---
+        since: datetime - only rows with a later `updated_at`
+        application_ids: list - only these applications
+        with_text: bool - include the TEXT_COLUMNS
+
+        Returns:
+        ---
+        pd.DataFrame - the matching rows
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("updated_at > @since")
+            params.append(bigquery.ScalarQueryParameter("since", "TIMESTAMP", since))
+        if application_ids is not None:
+            where.append("application_id IN UNNEST(@ids)")
+            params.append(bigquery.ArrayQueryParameter("ids", "STRING", list(application_ids)))
+        columns = "*" if with_text else f"* EXCEPT ({', '.join(TEXT_COLUMNS)})"
+        query = f"""
+        SELECT {columns} FROM `{self.table}`
+        {f"WHERE {' AND '.join(where)}" if where else ""}
+        """
+        return self._query(query, params).to_dataframe()
+
+    def query_ids(self) -> set:
+        """
+        Every application_id in the table; only the id column is scanned.
+        """
+        return {row['application_id'] for row in self._query(f"SELECT application_id FROM `{self.table}`")}
+
+    def query_text(self, application_ids: list) -> pd.DataFrame:
+        """
+        application_id, updated_at and the TEXT_COLUMNS of the given applications.
+        """
+        query = f"""
+        SELECT application_id, updated_at, {", ".join(TEXT_COLUMNS)}
+        FROM `{self.table}`
+        WHERE application_id IN UNNEST(@ids)
+        """
+        params = [bigquery.ArrayQueryParameter("ids", "STRING", list(application_ids))]
+        return self._query(query, params).to_dataframe()
+
+    def query_application(self, application_id: str) -> "Application":
+        """
+        The stored application with `application_id`, or None.
+        """
+        query = f"SELECT * FROM `{self.table}` WHERE application_id = @application_id"
+        params = [bigquery.ScalarQueryParameter("application_id", "STRING", application_id)]
+        for row in self._query(query, params):
+            return application_from_record(dict(row))
+        return None
+
+    def upsert(self, applications: list) -> None:
+        upsert_applications_to_bigQuery_table(applications)
+
+    def delete(self, application_ids: list) -> None:
+        delete_applications_from_bigQuery_table(application_ids)
+
+
+@lru_cache(maxsize=None)
+def _duckdb():
+    """
+    Import DuckDB on first use; only the duckdb backend needs it.
+    """
+    try:
+        import duckdb
+    except ImportError as err:
+        raise ImportError("APPLICATIONS_BACKEND=duckdb needs the duckdb package: pip install .[local]") from err
+    return duckdb
+
+
+class DuckDBApplications:
+    """
+    The applications table in an in-memory DuckDB database backed by a Parquet file.
+
+    The file is read on first use and rewritten after every write. Queries
+    run on their own cursors, so threads can read concurrently; writes are serialised.
+
+    Args:
+    ---
+    path: str - Parquet file holding the table
+    """
+    local = True
+
+    def __init__(self, path: str = APPLICATIONS_PARQUET):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        with self._lock:
+            if self._connection is None:
+                connection = _duckdb().connect()
+                connection.execute("SET TimeZone = 'UTC'")
+                columns = ", ".join(f"{field['name']} {DUCKDB_TYPES[field['type']]}" for field in SCHEMA)
+                connection.execute(f"CREATE TABLE applications ({columns}, PRIMARY KEY (application_id))")
+                if os.path.exists(self.path):
+                    self._insert(connection, pq.read_table(self.path))
+                    logging.info(f"Loaded {self.path} into the local applications table")
+                self._connection = connection
+            return self._connection
+
+    def _query(self, query: str, params: list = None):
+        cursor = self._connect().cursor()
+        return cursor.execute(query, params or [])
+
+    @staticmethod
+    def _insert(connection, rows: pa.Table, update: bool = False) -> None:
+        connection.register('staged_rows', rows)
+        try:
+            conflict = ""
+            if update:
+                assignments = ", ".join(
+                    f"{name} = excluded.{name}" for name in rows.column_names
+                    if name not in ('application_id', 'created_at')
+                )
+                conflict = f"ON CONFLICT (application_id) DO UPDATE SET {assignments}"
+            connection.execute(f"INSERT INTO applications BY NAME SELECT * FROM staged_rows {conflict}")
+        finally:
+            connection.unregister('staged_rows')
+
+    def _save(self, connection) -> None:
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.parquet', delete=False) as tmp:
+            pass
+        # COPY takes no parameters; the path is ours, not user input
+        target = tmp.name.replace("'", "''")
+        connection.execute(f"COPY applications TO '{target}' (FORMAT PARQUET)")
+        os.replace(tmp.name, self.path)
+
+    def query_rows(self, since: datetime.datetime = None, application_ids: list = None,
+                   with_text: bool = False) -> pd.DataFrame:
+        """
+        Rows of the table, without the TEXT_COLUMNS unless `with_text`. See `BigQueryApplications.query_rows`.
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("updated_at > ?")
+            params.append(since)
+        if application_ids is not None:
+            where.append("list_contains(?::VARCHAR[], application_id)")
+            params.append(list(application_ids))
+        columns = "*" if with_text else f"* EXCLUDE ({', '.join(TEXT_COLUMNS)})"
+        query = f"""
+        SELECT {columns} FROM applications
+        {f"WHERE {' AND '.join(where)}" if where else ""}
+        """
+        return self._query(query, params).df()
+
+    def query_ids(self) -> set:
+        return {row[0] for row in self._query("SELECT application_id FROM applications").fetchall()}
+
+    def query_text(self, application_ids: list) -> pd.DataFrame:
+        query = f"""
+        SELECT application_id, updated_at, {", ".join(TEXT_COLUMNS)}
+        FROM applications
+        WHERE list_contains(?::VARCHAR[], application_id)
+        """
+        return self._query(query, [list(application_ids)]).df()
+
+    def query_application(self, application_id: str) -> "Application":
+        cursor = self._query("SELECT * FROM applications WHERE application_id = ?", [application_id])
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return application_from_record(dict(zip([column[0] for column in cursor.description], row)))
+
+    def upsert(self, applications: list) -> None:
+        """
+        Insert or update applications (the last one per id wins), keeping each row's created_at.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        rows = {}
+        for application in applications:
+            rows[application.application_id] = {**application.model_dump(), 'created_at': now, 'updated_at': now}
+        if not rows:
+            return
+        staged = pa.Table.from_pylist(list(rows.values()), schema=ARROW_SCHEMA)
+        connection = self._connect()
+        with self._lock:
+            self._insert(connection, staged, update=True)
+            self._save(connection)
+        logging.info(f"Upserted {len(rows)} rows into {self.path}")
+
+    def delete(self, application_ids: list) -> None:
+        connection = self._connect()
+        with self._lock:
+            connection.execute(
+                "DELETE FROM applications WHERE list_contains(?::VARCHAR[], application_id)",
+                [list(application_ids)],
+            )
+            self._save(connection)
+
+    def replace_rows(self, dff: pd.DataFrame) -> None:
+        """
+        Replace the whole table with `dff`, e.g. a full BigQuery export.
+        """
+        dff = dff.assign(core_skills=dff['core_skills'].map(skill_list))
+        rows = pa.Table.from_pandas(dff[ARROW_SCHEMA.names], schema=ARROW_SCHEMA, preserve_index=False)
+        connection = self._connect()
+        with self._lock:
+            connection.execute("DELETE FROM applications")
+            self._insert(connection, rows)
+            self._save(connection)
+        logging.info(f"Wrote {len(dff)} rows to {self.path}")
+
+
+REPOSITORIES = {
+    'bigquery': BigQueryApplications,
+    'duckdb': DuckDBApplications,
+}
+
+
+@lru_cache(maxsize=None)
+def get_repository(backend: str = None):
+    """
+    The shared repository for `backend`, defaults to APPLICATIONS_BACKEND.
+    """
+    backend = backend or APPLICATIONS_BACKEND
+    if backend not in REPOSITORIES:
+        raise ValueError(f"Unknown applications backend: {backend}")
+    return REPOSITORIES[backend]()
+
+
+if __name__ == "__main__":
+    # Copy the BigQuery table into the local Parquet file
+    get_repository('duckdb').replace_rows(get_repository('bigquery').query_rows(with_text=True))
@@ -0,0 +1,297 @@
+"""
+Sparse term-document index over the application text fields.
+
+Each field in SEARCH_FIELDS is held as a scipy CSR matrix of token counts with
+one row per application and one column per term of a shared vocabulary. The
+word cloud, BM25-ranked search and any other text feature read from this one
+structure instead of tokenizing raw text per request.
+
+The index is kept current by `updated_at`: a refresh tokenizes only new or
+edited applications, replaces their rows and drops deleted ones. It is
+persisted to disk so a restarted worker does not re-tokenize the whole table.
+"""
+import os
+import logging
+import tempfile
+import threading
+from collections import Counter
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from data_utils.applications import (
+    TEXT_COLUMNS, load_applications, load_application_text, applications_version
+)
+from data_utils.text import (
+    TOKENIZER_BACKEND, TOKENIZER_VERSION, EXTRA_STOPWORDS, SEARCH_STOPWORDS, tokenize, search_keywords
+)
+
+# Where the index is persisted between restarts
+TERM_INDEX_PATH = os.environ.get(
+    "TERM_INDEX_PATH", os.path.join(tempfile.gettempdir(), "ds_dashboard_terms.npz")
+)
+
+# Stored with the index; an index built by another tokenizer is rebuilt
+TOKENIZER_ID = f"{TOKENIZER_BACKEND}:{TOKENIZER_VERSION}"
+
+# Fields indexed for search; TEXT_COLUMNS are fetched lazily, the rest come from the cached table
+SEARCH_FIELDS = ['company_name', 'job_title'] + TEXT_COLUMNS
+
+# BM25 term-frequency saturation and document-length normalisation
+BM25_K1 = float(os.environ.get("BM25_K1", 1.5))
+BM25_B = float(os.environ.get("BM25_B", 0.75))
+
+
+def _empty_matrix(n_rows: int = 0, n_terms: int = 0) -> sparse.csr_matrix:
+    return sparse.csr_matrix((n_rows, n_terms), dtype=np.int32)
+
+
+class TermIndex:
+    """
+    Per-field application x term count matrices, kept current by `updated_at`.
+
+    Args:
+    ---
+    fields: list - text columns to index, e.g. SEARCH_FIELDS
+    path: str - .npz file the index is persisted to, or None to keep it in memory only
+    hidden_terms: list - indexed and searchable, but left out of `frequencies` and `top_terms`
+    """
+
+    def __init__(self, fields: list, path: str = None, hidden_terms: list = EXTRA_STOPWORDS):
+        self.fields = list(fields)
+        self.path = path
+        self.hidden_terms = frozenset(hidden_terms)
+        self.ids = None
+        self.versions = {}
+        self.terms = []
+        self.vocabulary = {}
+        self.matrices = {}
+        self._rows = {}
+        self._table_version = None
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------------------
+    # Persistence
+    # -----------------------------------------------------------------
+
+    def _reset(self) -> None:
+        self.ids, self.versions, self.terms, self.vocabulary = [], {}, [], {}
+        self.matrices = {field: _empty_matrix() for field in self.fields}
+
+    def _load(self) -> None:
+        self._reset()
+        if not (self.path and os.path.exists(self.path)):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                if stored['fields'].tolist() != self.fields:
+                    return
+                if 'tokenizer' not in stored.files or str(stored['tokenizer']) != TOKENIZER_ID:
+                    logging.info(f"Rebuilding term index {self.path} for tokenizer {TOKENIZER_ID}")
+                    return
+                ids = stored['ids'].tolist()
+                terms = stored['terms'].tolist()
+                matrices = {
+                    field: sparse.csr_matrix(
+                        (stored[f'{field}_data'], stored[f'{field}_indices'], stored[f'{field}_indptr']),
+                        shape=(len(ids), len(terms)),
+                    )
+                    for field in self.fields
+                }
+                versions = dict(zip(ids, stored['versions'].tolist()))
+        except (ValueError, KeyError, OSError) as err:
+            logging.warning(f"Ignoring unreadable term index {self.path}: {err}")
+            return
+        self.ids, self.versions, self.terms, self.matrices = ids, versions, terms, matrices
+        self.vocabulary = {term: col for col, term in enumerate(terms)}
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        arrays = {
+            'fields': np.array(self.fields, dtype=str),
+            'tokenizer': np.array(TOKENIZER_ID),
+            'ids': np.array(self.ids, dtype=str),
+            'versions': np.array([self.versions[i] for i in self.ids], dtype=str),
+            'terms': np.array(self.terms, dtype=str),
+        }
+        for field, matrix in self.matrices.items():
+            arrays[f'{field}_data'] = matrix.data
+            arrays[f'{field}_indices'] = matrix.indices
+            arrays[f'{field}_indptr'] = matrix.indptr
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.npz', delete=False) as tmp:
+            np.savez(tmp, **arrays)
+        os.replace(tmp.name, self.path)
+
+    # -----------------------------------------------------------------
+    # Updates
+    # -----------------------------------------------------------------
+
+    def _count_matrix(self, tokens: pd.Series) -> sparse.csr_matrix:
+        rows, cols, counts = [], [], []
+        for row, values in enumerate(tokens):
+            for term, count in Counter(values).items():
+                cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                rows.append(row)
+                counts.append(count)
+        return sparse.csr_matrix(
+            (np.array(counts, dtype=np.int32), (rows, cols)),
+            shape=(len(tokens), len(self.vocabulary)),
+        )
+
+    def refresh(self) -> None:
+        """
+        Tokenize new or edited applications into the index and drop deleted ones.
+
+        Called before every query; a no-op while the applications table is unchanged.
+        Writers can call it right after a write to update the index eagerly.
+        """
+        version = applications_version()
+        with self._lock:
+            if self.ids is None:
+                self._load()
+            if version == self._table_version:
+                return
+            table = load_applications().set_index('application_id')
+            current = table['updated_at'].map(str).to_dict()
+            stale = [i for i, updated_at in current.items() if self.versions.get(i) != updated_at]
+            keep = [row for row, i in enumerate(self.ids) if i in current and self.versions[i] == current[i]]
+            if stale or len(keep) < len(self.ids):
+                text = load_application_text(stale)
+                table_fields = [field for field in self.fields if field not in TEXT_COLUMNS]
+                if table_fields:
+                    text = text.join(table[table_fields])
+                added = [i for i in stale if i in text.index]
+                new_rows = {field: self._count_matrix(tokenize(text.loc[added, field], stopwords=SEARCH_STOPWORDS)) for field in self.fields}
+                # Terms of replaced or deleted rows stay in the vocabulary as empty columns
+                n_terms = len(self.vocabulary)
+                for field in self.fields:
+                    kept = self.matrices[field][keep]
+                    kept.resize((kept.shape[0], n_terms))
+                    new = new_rows[field]
+                    new.resize((new.shape[0], n_terms))
+                    self.matrices[field] = sparse.vstack([kept, new], format='csr', dtype=np.int32)
+                self.ids = [self.ids[row] for row in keep] + added
+                self.versions = {i: current[i] for i in self.ids}
+                self.terms = list(self.vocabulary)
+                self._save()
+                logging.info(f"Indexed text for {len(added)} applications, {len(self.ids)} in the term index")
+            self._rows = {i: row for row, i in enumerate(self.ids)}
+            self._table_version = version
+
+    # -----------------------------------------------------------------
+    # Queries
+    # -----------------------------------------------------------------
+
+    def _matrix(self, fields: list = None) -> tuple:
+        """
+        Row lookup, vocabulary and summed count matrix over `fields` (all fields by default).
+        """
+        self.refresh()
+        with self._lock:
+            fields = fields or self.fields
+            matrix = self.matrices[fields[0]]
+            for field in fields[1:]:
+                matrix = matrix + self.matrices[field]
+            return self._rows, self.terms, matrix
+
+    def _column(self, term: str, matrix: sparse.csr_matrix):
+        col = self.vocabulary.get(term)
+        # Terms added by a refresh running after the matrix was taken are not in it
+        return col if col is not None and col < matrix.shape[1] else None
+
+    def _term_totals(self, application_ids: list, fields: list = None) -> tuple:
+        rows, terms, matrix = self._matrix(fields)
+        selected = [rows[i] for i in dict.fromkeys(application_ids) if i in rows]
+        totals = np.asarray(matrix[selected].sum(axis=0)).ravel()
+        hidden = [col for col in (self._column(term, matrix) for term in self.hidden_terms) if col is not None]
+        totals[hidden] = 0
+        return terms, totals
+
+    def frequencies(self, application_ids: list, fields: list = None) -> Counter:
+        """
+        Summed term counts over the given applications.
+
+        Args:
+        ---
+        application_ids: list - applications to count over
+        fields: list - text columns to count, defaults to every indexed field
+
+        Returns:
+        ---
+        Counter - term -> count, only terms that occur
+        """
+        terms, totals = self._term_totals(application_ids, fields)
+        return Counter({terms[col]: int(totals[col]) for col in np.flatnonzero(totals)})
+
+    def top_terms(self, application_ids: list, k: int = 20, fields: list = None) -> list:
+        """
+        The `k` most frequent (term, count) pairs over the given applications, most frequent first.
+        """
+        terms, totals = self._term_totals(application_ids, fields)
+        nonzero = np.flatnonzero(totals)
+        # Ties keep vocabulary order, so equal counts rank the same on every call
+        ranked = nonzero[np.argsort(-totals[nonzero], kind='stable')[:k]]
+        return [(terms[col], int(totals[col])) for col in ranked]
+
+    def term_frequency(self, term: str, fields: list = None) -> pd.Series:
+        """
+        Count of `term` in each application that contains it, indexed by application_id.
+        """
+        rows, terms, matrix = self._matrix(fields)
+        ids = list(rows)
+        col = self._column(term, matrix)
+        if col is None:
+            return pd.Series([], index=pd.Index([], name='application_id'), dtype='int64', name=term)
+        counts = matrix[:, col].toarray().ravel()
+        found = np.flatnonzero(counts)
+        return pd.Series(
+            counts[found].astype('int64'),
+            index=pd.Index([ids[row] for row in found], name='application_id'),
+            name=term,
+        )
+
+    def bm25(self, query: str, fields: list = None) -> pd.Series:
+        """
+        Okapi BM25 score of every application matching any keyword of `query`.
+
+        The query is tokenized like the indexed text, so English stopwords are ignored.
+        Document length is the token count over `fields`.
+
+        Args:
+        ---
+        query: str - free-text query
+        fields: list - fields to score, defaults to every indexed field
+
+        Returns:
+        ---
+        pd.Series - scores indexed by application_id, best match first
+        """
+        keywords = list(dict.fromkeys(search_keywords(query)))
+        rows, terms, matrix = self._matrix(fields)
+        cols = [col for col in (self._column(keyword, matrix) for keyword in keywords) if col is not None]
+        if not cols:
+            return pd.Series([], index=pd.Index([], name='application_id'), dtype='float64', name='score')
+        lengths = np.asarray(matrix.sum(axis=1)).ravel()
+        tf = matrix[:, cols].toarray().astype('float64')
+        df = (tf > 0).sum(axis=0)
+        idf = np.log(1 + (len(lengths) - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1))
+        scores = (idf * tf * (BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+        matched = np.flatnonzero(scores > 0)
+        ranked = matched[np.argsort(-scores[matched], kind='stable')]
+        ids = list(rows)
+        return pd.Series(
+            scores[ranked],
+            index=pd.Index([ids[row] for row in ranked], name='application_id'),
+            name='score',
+        )
+
+    def search(self, query: str, fields: list = None) -> list:
+        """
+        Applications matching `query`, best BM25 score first.
+        """
+        return self.bm25(query, fields).index.tolist()
+
+term_index = TermIndex(SEARCH_FIELDS, TERM_INDEX_PATH)
@@ -0,0 +1,192 @@
+"""
+Tokenization of the application text fields for the word cloud.
+
+The default 'regex' backend splits text on whitespace and punctuation with
+vectorized string operations and an embedded stopword list, so no NLTK corpus
+has to be downloaded at runtime. It keeps the tokens `nltk.word_tokenize` and
+the alphanumeric filter keep, apart from sentence boundaries that only Punkt
+can tell; set TOKENIZER_BACKEND=nltk to tokenize with NLTK itself.
+
+Tokenized text is indexed per application in `data_utils.term_index`. The
+index keeps the word-cloud noise words (EXTRA_STOPWORDS) so they can still be
+searched for, and hides them from the word-cloud counts.
+"""
+import os
+import re
+from functools import lru_cache
+import pandas as pd
+
+EXTRA_STOPWORDS = [
+    'order',
+    'food',
+    'get',
+    'business',
+    'product',
+    'team',
+    'data',
+    'work',
+    'new',
+    'needs',
+    'ensure',
+    'prefered',
+    'strong',
+    'ability',
+    'years',
+    'skills',
+    'proven',
+    ]
+
+# NLTK's English stopword corpus, kept here so tokenizing needs no download
+ENGLISH_STOPWORDS = [
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're",
+    "you've", "you'll", "you'd", 'your', 'yours', 'yourself', 'yourselves', 'he',
+    'him', 'his', 'himself', 'she', "she's", 'her', 'hers', 'herself', 'it', "it's",
+    'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which',
+    'who', 'whom', 'this', 'that', "that'll", 'these', 'those', 'am', 'is', 'are',
+    'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do',
+    'does', 'did', 'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because',
+    'as', 'until', 'while', 'of', 'at', 'by', 'for', 'with', 'about', 'against',
+    'between', 'into', 'through', 'during', 'before', 'after', 'above', 'below',
+    'to', 'from', 'up', 'down', 'in', 'out', 'on', 'off', 'over', 'under', 'again',
+    'further', 'then', 'once', 'here', 'there', 'when', 'where', 'why', 'how', 'all',
+    'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such', 'no',
+    'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's', 't',
+    'can', 'will', 'just', 'don', "don't", 'should', "should've", 'now', 'd', 'll',
+    'm', 'o', 're', 've', 'y', 'ain', 'aren', "aren't", 'couldn', "couldn't",
+    'didn', "didn't", 'doesn', "doesn't", 'hadn', "hadn't", 'hasn', "hasn't",
+    'haven', "haven't", 'isn', "isn't", 'ma', 'mightn', "mightn't", 'mustn',
+    "mustn't", 'needn', "needn't", 'shan', "shan't", 'shouldn', "shouldn't", 'wasn',
+    "wasn't", 'weren', "weren't", 'won', "won't", 'wouldn', "wouldn't",
+    ]
+
+STOPWORDS = frozenset(ENGLISH_STOPWORDS).union(EXTRA_STOPWORDS)
+
+# Search keeps the word-cloud noise words: "data" or "product" are real queries
+SEARCH_STOPWORDS = frozenset(ENGLISH_STOPWORDS)
+
+# 'regex' (default, no corpus download) or 'nltk' (Punkt + word_tokenize)
+TOKENIZER_BACKEND = os.environ.get("TOKENIZER_BACKEND", "regex")
+
+# Bumped whenever a backend's tokens change, so persisted term indexes are rebuilt
+TOKENIZER_VERSION = 4
+
+# ---------------------------------------------------------------------
+# Regex tokenizer
+# ---------------------------------------------------------------------
+
+# Mirrors `nltk.word_tokenize` followed by the alphanumeric filter the NLTK
+# backend applies, with vectorized replacements instead of per-text regexes.
+# NLTK pads quotes, brackets and most punctuation with spaces, splits
+# contractions ("can't" -> "ca" "n't", "bachelor's" -> "bachelor" "'s") and
+# detaches the final period of each sentence. Everything else stays inside
+# its whitespace-separated token, so "e.g.", "node.js", "A/B", "1,000+" and
+# "cross-functional" are not alphanumeric and are dropped. Sentence ends are
+# approximated: a period before whitespace is detached unless it ends a
+# common abbreviation, where NLTK would rely on Punkt.
+_SEPARATOR_CHARS = str.maketrans({char: ' ' for char in '«“‘„”’»`";@#$%&?!*()[]{}<>'})
+# Commas and colons except inside numbers ("1,000", "10:30"), ellipses and
+# double dashes; one pass each is faster than a single alternation
+_SEPARATORS = (re.compile(r"[:,](?!\d)"), re.compile(r"\.\.+"), re.compile(r"--"))
+_ABBREVIATIONS = ('etc', 'inc', 'ltd', 'vs', 'approx', 'dept', 'mr', 'mrs', 'dr', 'jr', 'sr', 'st', 'no')
+# Matched at the period first, then checked against the abbreviations, which keeps it fast
+_SENTENCE_END = re.compile(r"\.(?=\s|$)" + "".join(rf"(?<!\b{word}\.)" for word in _ABBREVIATIONS))
+# Clitics and closing quotes at the end of a token
+_CLITICS = re.compile(r"(?:n't|'(?:s|m|d|ll|re|ve)?)(?=\s|$)")
+# Words NLTK splits in two; the halves that are not stopwords are kept
+_SPLIT_WORDS = {
+    'cannot': ['can', 'not'],
+    'gimme': ['gim', 'me'],
+    'gonna': ['gon', 'na'],
+    'gotta': ['got', 'ta'],
+    'lemme': ['lem', 'me'],
+    'wanna': ['wan', 'na'],
+}
+
+
+def regex_tokenize(texts: pd.Series, stopwords: frozenset = STOPWORDS) -> pd.Series:
+    """
+    Tokenize a whole Series of texts with vectorized string operations.
+
+    Args:
+    ---
+    texts: pd.Series - raw text, one document per row
+    stopwords: frozenset - tokens to drop
+
+    Returns:
+    ---
+    pd.Series - list of lowercased, alphanumeric, non-stopword tokens per row, aligned with `texts`
+    """
+    values = texts.reset_index(drop=True).fillna('').astype(str).str.lower().str.translate(_SEPARATOR_CHARS)
+    for pattern in (*_SEPARATORS, _SENTENCE_END, _CLITICS):
+        values = values.str.replace(pattern, ' ', regex=True)
+    tokens = values.str.split().explode()
+    split = tokens.isin(_SPLIT_WORDS)
+    if split.any():
+        tokens = tokens.where(~split, tokens.map(_SPLIT_WORDS)).explode()
+    tokens = tokens[tokens.notna() & tokens.str.isalnum() & ~tokens.isin(stopwords)]
+    kept = tokens.groupby(level=0).agg(list)
+    return pd.Series(
+        [kept.get(row, []) for row in range(len(values))], index=texts.index, dtype=object
+    )
+
+# ---------------------------------------------------------------------
+# NLTK tokenizer
+# ---------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _nltk_word_tokenize():
+    """
+    Import NLTK and download the Punkt model on first use (not at import).
+    """
+    import nltk
+    from nltk.tokenize import word_tokenize
+    nltk.download('punkt_tab', quiet=True)
+    return word_tokenize
+
+
+def nltk_tokenize(texts: pd.Series, stopwords: frozenset = STOPWORDS) -> pd.Series:
+    """
+    Tokenize each text with `nltk.word_tokenize`; slower, and needs the punkt_tab download.
+    """
+    word_tokenize = _nltk_word_tokenize()
+    return texts.fillna('').astype(str).map(
+        lambda text: [word for word in word_tokenize(text.lower()) if word.isalnum() and word not in stopwords]
+    )
+
+
+TOKENIZERS = {
+    'regex': regex_tokenize,
+    'nltk': nltk_tokenize,
+}
+
+
+def tokenize(texts: pd.Series, backend: str = None, stopwords: frozenset = STOPWORDS) -> pd.Series:
+    """
+    Word-cloud tokens for each text with the configured tokenizer backend.
+
+    Args:
+    ---
+    texts: pd.Series - raw text, one document per row
+    backend: str - key of TOKENIZERS, defaults to TOKENIZER_BACKEND
+    stopwords: frozenset - tokens to drop, SEARCH_STOPWORDS for search fields and queries
+
+    Returns:
+    ---
+    pd.Series - list of lowercased, alphanumeric, non-stopword tokens per row
+    """
+    backend = backend or TOKENIZER_BACKEND
+    if backend not in TOKENIZERS:
+        raise ValueError(f"Unknown tokenizer backend: {backend}")
+    return TOKENIZERS[backend](texts, stopwords)
+
+
+# Function to preprocess text
+def preprocess_text(text):
+    return tokenize(pd.Series([text])).iloc[0]
+
+
+def search_keywords(query: str) -> list:
+    """
+    Keywords of a search query, tokenized like the indexed search fields.
+    """
+    return tokenize(pd.Series([query]), stopwords=SEARCH_STOPWORDS).iloc[0]
@@ -2,9 +2,16 @@ import json
 import pytz
 import datetime
 import logging
+import uuid
+import tempfile
+from typing import Iterable, TYPE_CHECKING
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
-from data_utils.datamodel import Application
+from apps.utils import get_bigquery_client
+
+if TYPE_CHECKING:
+    # datamodel reads its options bucket from Secret Manager at import
+    from data_utils.datamodel import Application
 
 # Configure logging
 logging.basicConfig(
@@ -15,6 +22,16 @@ logging.basicConfig(
 # Get the Chicago timezone
 chicago_tz = pytz.timezone('America/Chicago')
 
+MAIN_TABLE_ID = "dashapp-375513.data_science_job_hunt.applications"
+# Each upsert stages into its own table, named with this prefix and a unique suffix
+STAGING_TABLE_ID = "dashapp-375513.data_science_job_hunt.applications_staging"
+
+# Staging tables left behind by a crashed upsert are dropped by BigQuery after this long
+STAGING_TABLE_EXPIRY = datetime.timedelta(hours=1)
+
+# Staged rows are kept in memory up to this size, then spilled to disk
+LOAD_SPOOL_BYTES = 16 * 2 ** 20
+
 # ---------------------------------------------------------------------
 # Define BigQuery Schema
 # ---------------------------------------------------------------------
@@ -53,50 +70,20 @@ def check_if_bigQuery_table_exists(client, table_ref):
     except NotFound:
         return False
 
-def upsert_data_to_bigQuery_table(
-        application_upsert: Application,
-        app_schema: list = BQ_APP_SCHEMA
-        ):
+def application_row(application: "Application", timestamp: str) -> dict:
     """
-    BigQuery upsert operation to insert or update data in the applications table
+    Serialise an Application to a JSON row matching BQ_APP_SCHEMA.
 
     Args:
     ---
-    application_upsert: Application - instance of the Application class
-    app_schema: list - list of bigquery.SchemaField objects
+    application: Application - instance of the Application class
+    timestamp: str - created_at / updated_at value for the row
 
     Returns:
     ---
-    None
+    dict - JSON-serialisable row
     """
-    mainTableId = "dashapp-375513.data_science_job_hunt.applications"
-    stagingTableId = "dashapp-375513.data_science_job_hunt.applications_staging"
-
-    client = bigquery.Client()
-
-    # Create main table if not present
-    tablePresent = check_if_bigQuery_table_exists(client, mainTableId)
-    if not tablePresent:
-        table = bigquery.Table(mainTableId, schema=app_schema)
-        table = client.create_table(table)
-        logging.info(f"Created main table {table.project}.{table.dataset_id}.{table.table_id}")
-    else:
-        logging.info(f"Main table {mainTableId} exists")
-
-    # Check if staging table is present and delete if it exists
-    stagingTablePresent = check_if_bigQuery_table_exists(client, stagingTableId)
-    if stagingTablePresent:
-        client.delete_table(stagingTableId, not_found_ok=True)
-        logging.info(f"Deleting staging table, id: {stagingTableId}")
-    else:
-        logging.info(f"Staging table {stagingTableId} does not exist, proceeding")
-
-    job_config = bigquery.LoadJobConfig(
-        schema=app_schema,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE
-    )
-    
-    application_dict = application_upsert.model_dump()
+    application_dict = application.model_dump()
 
     # Transform core_skills for BigQuery schema
     application_dict['core_skills'] = {'list': [{'element': i} for i in application_dict['core_skills']]}
@@ -108,44 +95,155 @@ def upsert_data_to_bigQuery_table(
         if application_dict.get(field) is not None:
             application_dict[field] = str(application_dict[field])
 
+    application_dict['created_at'] = timestamp
+    application_dict['updated_at'] = timestamp
+    return application_dict
+
+
+def staging_table_id() -> str:
+    """
+    A staging table id no other upsert uses, so concurrent upserts never share one.
+    """
+    return f"{STAGING_TABLE_ID}_{uuid.uuid4().hex}"
+
+
+def upsert_applications_to_bigQuery_table(
+        applications: Iterable["Application"],
+        app_schema: list = BQ_APP_SCHEMA,
+        client: bigquery.Client = None
+        ):
+    """
+    Insert or update many applications with one load job and one MERGE.
+
+    Rows are deduplicated by application_id (the last one wins) and written as
+    newline-delimited JSON into a staging table created for this call, which is
+    then merged into the main table and deleted. The number of API calls does
+    not depend on the batch size, and concurrent calls never touch each
+    other's staging data.
+
+    Args:
+    ---
+    applications: Iterable[Application] - instances of the Application class
+    app_schema: list - list of bigquery.SchemaField objects
+    client: bigquery.Client - client to use, defaults to the shared client
+
+    Returns:
+    ---
+    bigquery.QueryJob - the finished MERGE job, or None when there was nothing to write
+    """
     # Add timestamps (using Chicago timezone)
     now_chicago = str(datetime.datetime.now().astimezone(chicago_tz))
-    application_dict['created_at'] = now_chicago
-    application_dict['updated_at'] = now_chicago
-
-    # Load data into the staging table
-    job = client.load_table_from_json([application_dict], stagingTableId, job_config=job_config)
-    job.result()
-    logging.info(f"Loaded data into staging table: {stagingTableId}")
-
-    # Build and execute the MERGE query
-    field_names = list(application_dict.keys())
-    update_set = ", ".join(
-        [f"M.{field} = S.{field}" for field in field_names if field not in ("application_id", "created_at")]
-    )
-    insert_fields = ", ".join(field_names)
-    insert_values = ", ".join([f"S.{field}" for field in field_names])
-
-    merge_query = f"""
-        MERGE INTO `{mainTableId}` M
-        USING `{stagingTableId}` S
-        ON M.application_id = S.application_id
-        WHEN MATCHED THEN
-        UPDATE SET {update_set}
-        WHEN NOT MATCHED THEN
-        INSERT ({insert_fields}) VALUES ({insert_values})
-    """
+    rows = {}
+    for application in applications:
+        rows[application.application_id] = application_row(application, now_chicago)
+    if not rows:
+        logging.info("No applications to upsert")
+        return None
+
+    client = client or get_bigquery_client()
+
+    # Create main table if not present
+    tablePresent = check_if_bigQuery_table_exists(client, MAIN_TABLE_ID)
+    if not tablePresent:
+        table = bigquery.Table(MAIN_TABLE_ID, schema=app_schema)
+        table = client.create_table(table, exists_ok=True)
+        logging.info(f"Created main table {table.project}.{table.dataset_id}.{table.table_id}")
+
+    stagingTableId = staging_table_id()
+    staging_table = bigquery.Table(stagingTableId, schema=app_schema)
+    staging_table.expires = datetime.datetime.now(datetime.timezone.utc) + STAGING_TABLE_EXPIRY
+    client.create_table(staging_table)
     try:
+        job_config = bigquery.LoadJobConfig(
+            schema=app_schema,
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND
+        )
+        with tempfile.SpooledTemporaryFile(max_size=LOAD_SPOOL_BYTES) as source:
+            for row in rows.values():
+                source.write(json.dumps(row).encode('utf-8') + b"\n")
+            source.seek(0)
+            job = client.load_table_from_file(source, stagingTableId, job_config=job_config)
+            job.result()
+        logging.info(f"Loaded {len(rows)} rows into staging table: {stagingTableId}")
+
+        # Build and execute the MERGE query
+        field_names = list(next(iter(rows.values())).keys())
+        update_set = ", ".join(
+            [f"M.{field} = S.{field}" for field in field_names if field not in ("application_id", "created_at")]
+        )
+        insert_fields = ", ".join(field_names)
+        insert_values = ", ".join([f"S.{field}" for field in field_names])
+
+        merge_query = f"""
+            MERGE INTO `{MAIN_TABLE_ID}` M
+            USING `{stagingTableId}` S
+            ON M.application_id = S.application_id
+            WHEN MATCHED THEN
+            UPDATE SET {update_set}
+            WHEN NOT MATCHED THEN
+            INSERT ({insert_fields}) VALUES ({insert_values})
+        """
         query_job = client.query(merge_query)
         query_job.result()  # Wait for the query to finish
-        logging.info("Merge operation completed successfully.")
-        
-        table = client.get_table(mainTableId)
-        logging.info(f"Loaded {table.num_rows} rows and {len(table.schema)} columns to {mainTableId}")
-        
-        client.delete_table(stagingTableId, not_found_ok=True)
-        logging.info(f"Deleting staging table, id: {stagingTableId}")
+        logging.info(f"Merged {query_job.num_dml_affected_rows} rows into {MAIN_TABLE_ID}")
         return query_job
     except Exception as err:
         logging.error(f"Failed to merge data: {err}")
         raise
+    finally:
+        client.delete_table(stagingTableId, not_found_ok=True)
+        logging.info(f"Deleting staging table, id: {stagingTableId}")
+
+
+def upsert_data_to_bigQuery_table(
+        application_upsert: "Application",
+        app_schema: list = BQ_APP_SCHEMA,
+        client: bigquery.Client = None
+        ):
+    """
+    BigQuery upsert operation to insert or update data in the applications table
+
+    Args:
+    ---
+    application_upsert: Application - instance of the Application class
+    app_schema: list - list of bigquery.SchemaField objects
+    client: bigquery.Client - client to use, defaults to the shared client
+
+    Returns:
+    ---
+    bigquery.QueryJob - the finished MERGE job
+    """
+    return upsert_applications_to_bigQuery_table([application_upsert], app_schema, client)
+
+
+def delete_applications_from_bigQuery_table(
+        application_ids: Iterable[str],
+        client: bigquery.Client = None
+        ):
+    """
+    Delete applications from the main table with one parameterized DELETE.
+
+    Args:
+    ---
+    application_ids: Iterable[str] - ids of the applications to delete
+    client: bigquery.Client - client to use, defaults to the shared client
+
+    Returns:
+    ---
+    bigquery.QueryJob - the finished DELETE job, or None when there was nothing to delete
+    """
+    application_ids = list(dict.fromkeys(application_ids))
+    if not application_ids:
+        return None
+    client = client or get_bigquery_client()
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("application_ids", "STRING", application_ids)]
+    )
+    query_job = client.query(
+        f"DELETE FROM `{MAIN_TABLE_ID}` WHERE application_id IN UNNEST(@application_ids)",
+        job_config=job_config,
+    )
+    query_job.result()
+    logging.info(f"Deleted {query_job.num_dml_affected_rows} rows from {MAIN_TABLE_ID}")
+    return query_job
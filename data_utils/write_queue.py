@@ -0,0 +1,418 @@
+"""
+Write-behind queue for application edits.
+
+The form used to block on the BigQuery staging load and MERGE for every
+submit. Edits are now appended to a local SQLite write-ahead log and the
+request returns as soon as the row is on disk. A background worker drains
+the log: pending entries are coalesced per application_id (the latest edit
+or delete wins), written with one batch upsert and one DELETE, and marked
+committed. A failed flush leaves the entries pending and is retried with
+exponential backoff, so edits survive a BigQuery outage or a restart of the
+worker process.
+
+Several processes (e.g. gunicorn workers) may share one log file. A flush
+first claims the entries it writes by marking them in flight under its own
+owner id, and only one flush at a time may hold claims, so an older edit can
+never reach BigQuery after a newer one. Claims of a process that died
+mid-flush are taken over after WRITE_QUEUE_CLAIM_TIMEOUT.
+
+The log only protects edits for as long as its file does. WRITE_QUEUE_PATH
+defaults to the system temp directory, which on App Engine is an in-memory,
+per-instance disk: edits still pending when an instance stops are lost.
+Point it at persistent storage where that matters.
+
+The queue is created on first use (`get_write_queue`) and its worker is
+started by the app (main.py), not when this module is imported.
+
+With the local duckdb backend, edits are written to the local table at once
+and the queue only keeps BigQuery in sync (set APPLICATIONS_SYNC=none to run
+without BigQuery).
+"""
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+import uuid
+from contextlib import closing
+from functools import lru_cache
+from data_utils.datamodel import Application
+from data_utils.applications import invalidate_applications
+from data_utils.term_index import term_index
+from data_utils.repository import get_repository
+from data_utils.upload_to_bq import upsert_applications_to_bigQuery_table, delete_applications_from_bigQuery_table
+
+# SQLite file holding the log; pending edits survive a restart only if this file does
+WRITE_QUEUE_PATH = os.environ.get(
+    "WRITE_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "ds_dashboard_writes.sqlite")
+)
+
+# Seconds the worker waits after a new edit so quick successive edits share one flush
+WRITE_QUEUE_DELAY = float(os.environ.get("WRITE_QUEUE_DELAY", 1))
+
+# First retry delay after a failed flush, doubled on every further failure up to the maximum
+WRITE_QUEUE_RETRY = float(os.environ.get("WRITE_QUEUE_RETRY", 5))
+WRITE_QUEUE_MAX_RETRY = float(os.environ.get("WRITE_QUEUE_MAX_RETRY", 300))
+
+# Committed entries are kept this many seconds for the status display, then pruned
+WRITE_QUEUE_RETENTION = float(os.environ.get("WRITE_QUEUE_RETENTION", 24 * 60 * 60))
+
+# Seconds after which entries claimed by a flush that never finished are claimed again
+WRITE_QUEUE_CLAIM_TIMEOUT = float(os.environ.get("WRITE_QUEUE_CLAIM_TIMEOUT", 600))
+
+# "bigquery" queues local-backend writes for BigQuery, "none" keeps them local only
+APPLICATIONS_SYNC = os.environ.get("APPLICATIONS_SYNC", "bigquery")
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+def _refresh_caches() -> None:
+    invalidate_applications()
+    term_index.refresh()
+
+
+class WriteQueue:
+    """
+    Durable queue of application upserts and deletes, committed by a background worker.
+
+    Args:
+    ---
+    path: str - SQLite file the log is kept in
+    upsert: callable - writes a list of Application objects to the target table
+    delete: callable - deletes a list of application ids from the target table
+    on_commit: callable - called after every successful flush, e.g. to refresh caches
+    """
+
+    def __init__(self, path: str, upsert=upsert_applications_to_bigQuery_table,
+                 delete=delete_applications_from_bigQuery_table, on_commit=_refresh_caches):
+        self.path = path
+        self.upsert = upsert
+        self.delete = delete
+        self.on_commit = on_commit
+        # Marks the entries this queue's flushes have claimed in the shared log
+        self.owner = uuid.uuid4().hex
+        self.failures = 0
+        self.last_error = None
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = None
+        self._create()
+
+    # -----------------------------------------------------------------
+    # Log
+    # -----------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # An acknowledged edit must be on disk, not just in the OS cache
+        connection.execute("PRAGMA synchronous=FULL")
+        return connection
+
+    def _create(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS writes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    application_id TEXT NOT NULL,
+                    op TEXT NOT NULL,
+                    payload TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    created_at REAL NOT NULL,
+                    committed_at REAL,
+                    owner TEXT,
+                    claimed_at REAL
+                )
+            """)
+            # Logs written before flushes claimed their entries
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(writes)")}
+            for column, column_type in (('owner', 'TEXT'), ('claimed_at', 'REAL')):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE writes ADD COLUMN {column} {column_type}")
+            connection.execute("CREATE INDEX IF NOT EXISTS writes_status ON writes (status, seq)")
+
+    def _append(self, application_id: str, op: str, payload: str = None) -> int:
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "INSERT INTO writes (application_id, op, payload, created_at) VALUES (?, ?, ?, ?)",
+                (application_id, op, payload, time.time()),
+            )
+            seq = cursor.lastrowid
+        self._wake.set()
+        return seq
+
+    def enqueue_upsert(self, application: Application) -> int:
+        """
+        Log an insert or update of `application` for the next flush.
+
+        Returns:
+        ---
+        int - sequence number of the entry, see `is_committed`
+        """
+        # Unset fields are left out so their defaults are not re-validated on load
+        payload = application.model_dump_json(exclude_unset=True)
+        return self._append(application.application_id, UPSERT, payload)
+
+    def enqueue_delete(self, application_id: str) -> int:
+        """
+        Log a delete of `application_id` for the next flush; it supersedes earlier pending edits.
+
+        Returns:
+        ---
+        int - sequence number of the entry, see `is_committed`
+        """
+        return self._append(str(application_id), DELETE)
+
+    def discard(self, application_id: str) -> int:
+        """
+        Drop the pending entries of `application_id`, e.g. once a newer local write supersedes them.
+
+        Returns:
+        ---
+        int - number of entries dropped
+        """
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "DELETE FROM writes WHERE application_id = ? AND status = 'pending'", (str(application_id),)
+            )
+        return cursor.rowcount
+
+    # -----------------------------------------------------------------
+    # Flushing
+    # -----------------------------------------------------------------
+
+    def _claim(self, connection: sqlite3.Connection) -> list:
+        """
+        Mark every uncommitted entry in flight for this queue, unless another flush holds a live claim.
+        """
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            busy = connection.execute(
+                "SELECT 1 FROM writes WHERE status = 'in_flight' AND claimed_at >= ? LIMIT 1",
+                (now - WRITE_QUEUE_CLAIM_TIMEOUT,),
+            ).fetchone()
+            if busy:
+                claimed = []
+            else:
+                # Stale claims are entries of a flush that died before marking them
+                claimed = connection.execute(
+                    "SELECT seq, application_id, op, payload FROM writes "
+                    "WHERE status IN ('pending', 'in_flight') ORDER BY seq"
+                ).fetchall()
+                connection.executemany(
+                    "UPDATE writes SET status = 'in_flight', owner = ?, claimed_at = ? WHERE seq = ?",
+                    [(self.owner, now, seq) for seq, *_ in claimed],
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def flush(self) -> int:
+        """
+        Commit every pending entry, coalesced to one write per application.
+
+        The entries are claimed first, so flushes of queues in other processes
+        sharing the log never overlap. While another flush holds its claim
+        nothing is written and 0 is returned.
+
+        Raises whatever the upsert or delete raised; the entries then return to pending.
+
+        Returns:
+        ---
+        int - number of log entries committed
+        """
+        with self._flush_lock, closing(self._connect()) as connection:
+            pending = self._claim(connection)
+            if not pending:
+                return 0
+            latest = {}
+            for seq, application_id, op, payload in pending:
+                latest[application_id] = (op, payload)
+            upserts = [Application.model_validate_json(payload) for op, payload in latest.values() if op == UPSERT]
+            deletes = [application_id for application_id, (op, _) in latest.items() if op == DELETE]
+            try:
+                if upserts:
+                    self.upsert(upserts)
+                if deletes:
+                    self.delete(deletes)
+            except Exception:
+                connection.execute(
+                    "UPDATE writes SET status = 'pending', owner = NULL, claimed_at = NULL "
+                    "WHERE status = 'in_flight' AND owner = ?",
+                    (self.owner,),
+                )
+                raise
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            # Only entries still claimed by this queue; a timed-out claim may have been taken over
+            connection.executemany(
+                "UPDATE writes SET status = 'committed', committed_at = ? WHERE seq = ? AND owner = ?",
+                [(now, seq, self.owner) for seq, *_ in pending],
+            )
+            connection.execute(
+                "DELETE FROM writes WHERE status = 'committed' AND committed_at < ?",
+                (now - WRITE_QUEUE_RETENTION,),
+            )
+            connection.execute("COMMIT")
+        logging.info(
+            f"Committed {len(pending)} queued writes as {len(upserts)} upserts and {len(deletes)} deletes"
+        )
+        if self.on_commit:
+            try:
+                self.on_commit()
+            except Exception as err:
+                logging.warning(f"Caches not refreshed after committing queued writes: {err}")
+        return len(pending)
+
+    def _retry_delay(self) -> float:
+        return min(WRITE_QUEUE_RETRY * 2 ** (self.failures - 1), WRITE_QUEUE_MAX_RETRY)
+
+    def _run(self) -> None:
+        while True:
+            # Pending entries left by a previous process are flushed on start
+            delay = None
+            try:
+                self.flush()
+                self.failures, self.last_error = 0, None
+                # Entries left over were held by a flush in another process; check back later
+                if self.status()['pending']:
+                    delay = WRITE_QUEUE_RETRY
+            except Exception as err:
+                self.failures += 1
+                self.last_error = str(err)
+                delay = self._retry_delay()
+                logging.error(f"Queued writes not committed, retrying in {delay:.0f}s: {err}")
+            # A new edit also cuts a retry delay short
+            self._wake.wait(delay)
+            self._wake.clear()
+            time.sleep(WRITE_QUEUE_DELAY)
+
+    def start(self) -> None:
+        """
+        Start the background worker if it is not running yet. Until then entries are only logged.
+        """
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="write-queue", daemon=True)
+                self._worker.start()
+
+    # -----------------------------------------------------------------
+    # Status
+    # -----------------------------------------------------------------
+
+    def pending(self) -> dict:
+        """
+        The latest pending state of every application with uncommitted edits.
+
+        Lets readers of the target table see their own writes before the worker commits them.
+
+        Returns:
+        ---
+        dict - application_id -> Application, or None for a pending delete
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT application_id, op, payload FROM writes WHERE status IN ('pending', 'in_flight') ORDER BY seq"
+            ).fetchall()
+        latest = {application_id: (op, payload) for application_id, op, payload in rows}
+        return {
+            application_id: Application.model_validate_json(payload) if op == UPSERT else None
+            for application_id, (op, payload) in latest.items()
+        }
+
+    def is_committed(self, seq: int) -> bool:
+        """
+        Whether entry `seq` has reached the target table (pruned entries count as committed).
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT status FROM writes WHERE seq = ?", (seq,)).fetchone()
+        return row is None or row[0] == 'committed'
+
+    def status(self) -> dict:
+        """
+        Counts of pending and committed entries and the error of the last failed flush.
+
+        Returns:
+        ---
+        dict - pending (including entries in flight), committed, last_committed (highest committed seq or 0), failures, last_error
+        """
+        with closing(self._connect()) as connection:
+            counts = dict(connection.execute("SELECT status, COUNT(*) FROM writes GROUP BY status").fetchall())
+            last_committed = connection.execute(
+                "SELECT MAX(seq) FROM writes WHERE status = 'committed'"
+            ).fetchone()[0]
+        return {
+            'pending': counts.get('pending', 0) + counts.get('in_flight', 0),
+            'committed': counts.get('committed', 0),
+            'last_committed': last_committed or 0,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+@lru_cache(maxsize=None)
+def get_write_queue() -> WriteQueue:
+    """
+    The shared queue on WRITE_QUEUE_PATH, created on first use. Call `start` to commit its entries.
+    """
+    if "WRITE_QUEUE_PATH" not in os.environ:
+        logging.warning(
+            f"WRITE_QUEUE_PATH is not set; queued edits are logged to {WRITE_QUEUE_PATH} "
+            "and are lost if that disk does not outlive the instance"
+        )
+    return WriteQueue(WRITE_QUEUE_PATH)
+
+
+def next_application_id() -> str:
+    """
+    The id for a new application: one past the highest numeric id stored or queued.
+
+    Read fresh from the backend (only the id column is scanned) rather than
+    from the cached table, which another instance may have written past.
+    """
+    ids = get_repository().query_ids() | set(get_write_queue().pending())
+    return str(max((int(i) for i in ids if str(i).isdigit()), default=0) + 1)
+
+
+def save_application(application: Application) -> int:
+    """
+    Insert or update an application through the configured backend.
+
+    The local backend stores it at once and queues it for BigQuery; with the
+    BigQuery backend the queue worker is the only writer.
+
+    Returns:
+    ---
+    int - write queue sequence number, or None when nothing was queued
+    """
+    repository = get_repository()
+    if repository.local:
+        repository.upsert([application])
+        _refresh_caches()
+        if APPLICATIONS_SYNC == 'none':
+            # Edits queued before sync was turned off would otherwise shadow this one
+            get_write_queue().discard(application.application_id)
+            return None
+    return get_write_queue().enqueue_upsert(application)
+
+
+def delete_application(application_id: str) -> int:
+    """
+    Delete an application through the configured backend, see `save_application`.
+    """
+    repository = get_repository()
+    if repository.local:
+        repository.delete([application_id])
+        _refresh_caches()
+        if APPLICATIONS_SYNC == 'none':
+            get_write_queue().discard(application_id)
+            return None
+    return get_write_queue().enqueue_delete(application_id)
@@ -1,7 +1,17 @@
 #!/bin/bash
 from dash import Dash, _dash_renderer
 import dash_mantine_components as dmc
+from apps.utils import access_secrets, prefetch_blobs, prefetch_secrets
+from apps.word_cloud import register_wordcloud_route
+from apps.clusters import register_clusters_route
 
+# Fetch every secret and GCS blob the pages read at import in concurrent
+# batches, before Dash imports the pages
+prefetch_secrets("dashapp-375513")
+prefetch_blobs(access_secrets("dashapp-375513", "BUCKET_NAME", "latest"))
+
+# Imported after the prefetch: the application model reads BUCKET_NAME at import
+from data_utils.write_queue import get_write_queue
 
 _dash_renderer._set_react_version("18.2.0")
 app = Dash(__name__,
@@ -12,5 +22,10 @@ app = Dash(__name__,
         )
 
 server = app.server
+register_wordcloud_route(server)
+register_clusters_route(server)
+
+# Commit edits left in the queue by a previous process, then keep committing new ones
+get_write_queue().start()
 
 app.config.suppress_callback_exceptions = True
@@ -0,0 +1,5 @@
+import os
+
+# Run the suite offline: secrets come from the environment instead of Secret Manager
+os.environ.setdefault("SECRETS_BACKEND", "local")
+os.environ.setdefault("BUCKET_NAME", "test-bucket")
@@ -0,0 +1,137 @@
+import datetime
+import pandas as pd
+from data_utils import applications
+from data_utils.applications import IncrementalApplications, merge_delta, typed_applications
+
+def make_rows(ids, updated_at, date='2025-01-01'):
+    return pd.DataFrame({
+        'application_id': [str(i) for i in ids],
+        'application_date': pd.to_datetime([date] * len(ids)),
+        'updated_at': pd.to_datetime([updated_at] * len(ids), utc=True),
+    })
+
+def test_merge_delta_replaces_updates_and_drops_deleted_ids():
+    """
+    Changed rows replace cached rows and ids missing from the table are removed.
+    """
+    cached = make_rows([1, 2, 3], '2025-01-01')
+    delta = make_rows([2, 4], '2025-01-02', date='2025-01-02')
+
+    merged = merge_delta(cached, delta, current_ids={'1', '2', '4'})
+
+    assert merged['application_id'].tolist() == ['2', '4', '1']
+    assert (merged.loc[merged['application_id'] == '2', 'updated_at'] == pd.Timestamp('2025-01-02', tz='UTC')).all()
+
+def test_incremental_refresh_only_fetches_changes(monkeypatch):
+    """
+    After the first full load, refreshes query by high-water mark and backfill ids the delta missed.
+    """
+    queries = []
+    def fake_query(since=None, application_ids=None):
+        queries.append('since' if since else application_ids)
+        if since is None and application_ids is None:
+            return make_rows([1, 2], '2025-01-01')
+        if since:
+            return make_rows([2], '2025-01-03')
+        return make_rows([5], '2024-12-31')
+
+    monkeypatch.setattr(applications, 'query_applications', fake_query)
+    monkeypatch.setattr(applications, 'query_application_ids', lambda: {'2', '5'})
+
+    table = IncrementalApplications()
+    assert len(table.refresh()) == 2
+    dff = table.refresh()
+
+    assert queries == [None, 'since', ['5']]
+    assert sorted(dff['application_id']) == ['2', '5']
+    assert table.high_water_mark == pd.Timestamp('2025-01-03', tz='UTC')
+
+def test_application_text_is_fetched_once_per_version(monkeypatch):
+    """
+    Text columns are queried only for ids that are uncached or have a newer updated_at.
+    """
+    table = make_rows([1, 2], '2025-01-01')
+    fetched = []
+    def fake_text_query(ids):
+        fetched.append(sorted(ids))
+        rows = table[table['application_id'].isin(ids)][['application_id', 'updated_at']].copy()
+        for col in applications.TEXT_COLUMNS:
+            rows[col] = 'text ' + rows['application_id']
+        return rows
+
+    monkeypatch.setattr(applications, 'load_applications', lambda: table)
+    monkeypatch.setattr(applications, 'query_application_text', fake_text_query)
+    monkeypatch.setattr(applications, '_text_cache', {})
+
+    assert applications.load_application_text(['1'])['requirements'].to_dict() == {'1': 'text 1'}
+    applications.load_application_text(['1', '2'])
+    table = make_rows([1, 2], '2025-01-05')
+    applications.load_application_text(['1', '2'])
+
+    assert fetched == [['1'], ['2'], ['1', '2']]
+
+def test_typed_applications_casts_to_compact_dtypes():
+    """
+    Untyped BigQuery rows get nullable booleans and ints, Arrow dates and skill lists, and categories.
+    """
+    raw = pd.DataFrame({
+        'application_id': ['1', '2'],
+        'application_date': [datetime.date(2025, 1, 2), None],
+        'office_participation': ['Remote', None],
+        'pay_min': [100000, None],
+        'offer': [True, None],
+        'core_skills': [{'list': [{'element': 'python'}, {'element': 'sql'}]}, None],
+        'updated_at': ['2025-01-02T00:00:00Z', '2025-01-03T00:00:00Z'],
+    }, dtype=object)
+
+    typed = typed_applications(raw)
+
+    assert typed['offer'].dtype == 'boolean' and typed['offer'].isna().tolist() == [False, True]
+    assert typed['pay_min'].dtype == 'Int64'
+    assert typed['office_participation'].dtype == 'category'
+    assert typed['application_id'].dtype == 'string'
+    assert typed['application_date'].tolist()[0] == datetime.date(2025, 1, 2)
+    assert typed['core_skills'].iloc[0] == ['python', 'sql'] and typed['core_skills'].isna().iloc[1]
+    assert str(typed['updated_at'].dt.tz) == 'UTC'
+    # Typing is idempotent, so already cached rows can be re-typed after a merge
+    assert typed_applications(typed).dtypes.equals(typed.dtypes)
+    assert raw['offer'].dtype == object
+
+def test_get_application_is_served_from_the_cached_table(monkeypatch):
+    """
+    Known ids are built from the cached table and text cache and reused until updated_at moves;
+    only ids missing from the table reach the backend.
+    """
+    table = typed_applications(make_rows([1], '2025-01-01').assign(
+        company_name=['Acme'], job_title=['Data Scientist'], application_source=['LinkedIn'],
+        core_skills=[{'list': [{'element': 'python'}]}], pay_min=[pd.NA],
+        **{col: [False] for col in applications.BOOL_COLUMNS},
+    ))
+    texts = []
+    def fake_text(ids):
+        texts.append(list(ids))
+        return pd.DataFrame({col: ['text'] for col in applications.TEXT_COLUMNS},
+                            index=pd.Index(ids, name='application_id'))
+    class FakeRepository:
+        def __init__(self):
+            self.lookups = []
+        def query_application(self, application_id):
+            self.lookups.append(application_id)
+            return None
+    repository = FakeRepository()
+    monkeypatch.setattr(applications, 'load_applications', lambda: table)
+    monkeypatch.setattr(applications, 'load_application_text', fake_text)
+    monkeypatch.setattr(applications, 'get_repository', lambda: repository)
+    monkeypatch.setattr(applications, 'applications_by_id', applications.LRUCache(maxsize=4))
+
+    application = applications.get_application('1')
+    assert application.company_name == 'Acme' and application.requirements == 'text'
+    assert application.core_skills == ['python'] and application.pay_min == 0
+    assert applications.get_application('1') is application
+
+    table = table.assign(updated_at=pd.Timestamp('2025-01-02', tz='UTC'), company_name='Acme Corp')
+    assert applications.get_application('1').company_name == 'Acme Corp'
+    assert texts == [['1'], ['1']]
+
+    assert applications.get_application('9') is None
+    assert repository.lookups == ['9']
@@ -0,0 +1,72 @@
+import threading
+import time
+from data_utils.cache import TTLCache, LRUCache
+
+def test_ttl_cache_reuses_value_until_invalidated():
+    """
+    A fresh value is served without calling the loader again, and invalidation forces a reload.
+    """
+    calls = []
+    cache = TTLCache(lambda: calls.append(1) or len(calls), ttl=60)
+
+    assert cache.get() == 1
+    assert cache.get() == 1
+    cache.invalidate()
+    assert cache.get() == 2
+    assert len(calls) == 2
+
+def test_ttl_cache_expires():
+    """
+    Values older than the ttl are reloaded.
+    """
+    calls = []
+    cache = TTLCache(lambda: calls.append(1) or len(calls), ttl=0.01)
+
+    cache.get()
+    time.sleep(0.02)
+    assert cache.get() == 2
+
+def test_ttl_cache_single_flight():
+    """
+    Concurrent readers of an empty cache trigger exactly one load.
+    """
+    calls = []
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "rows"
+
+    cache = TTLCache(slow_loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["rows"] * 10
+    assert len(calls) == 1
+
+def test_ttl_cache_drops_load_started_before_invalidation():
+    """
+    A load that overlaps an invalidation is returned to its caller but not kept.
+    """
+    cache = TTLCache(lambda: cache.invalidate() or "stale", ttl=60)
+    assert cache.get() == "stale"
+    cache.loader = lambda: "fresh"
+    assert cache.get() == "fresh"
+
+def test_lru_cache_evicts_least_recently_used():
+    """
+    Reading a key keeps it; the oldest untouched key is evicted past maxsize.
+    """
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get_or_set('a', lambda: 99) == 1
+    assert cache.get_or_set('d', lambda: 4) == 4
+    assert len(cache) == 2
@@ -0,0 +1,27 @@
+from flask import Flask
+from apps import clusters
+from apps.clusters import register_clusters_route, cluster_figure_url
+
+def test_cluster_figure_is_encoded_once_and_served_with_etag(monkeypatch):
+    """
+    Each resolution is JSON-encoded once per worker; repeat requests revalidate to a 304.
+    """
+    encoded = []
+    def fake_figure(full_resolution=False):
+        encoded.append(full_resolution)
+        return {'data': [{'type': 'scatter3d', 'x': [1, 2, 3] if full_resolution else [1]}], 'layout': {}}
+    monkeypatch.setattr(clusters, 'cluster_figure', fake_figure)
+    clusters.cluster_figure_json.cache_clear()
+    server = Flask(__name__)
+    register_clusters_route(server)
+    client = server.test_client()
+
+    response = client.get(cluster_figure_url('full'))
+    assert response.status_code == 200
+    assert response.json['data'][0]['x'] == [1, 2, 3]
+    etag = response.headers['ETag']
+    assert client.get(cluster_figure_url('full'), headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(cluster_figure_url('decimated')).json['data'][0]['x'] == [1]
+    assert encoded == [True, False]
+    assert client.get('/clusters/other.json').status_code == 404
+    clusters.cluster_figure_json.cache_clear()
@@ -0,0 +1,87 @@
+import numpy as np
+import plotly.graph_objects as go
+import datetime
+from scipy.stats import gaussian_kde
+from apps.figures import decimate_figure, calendar_counts, binned_kde, histogram_bins, box_stats
+
+def test_decimate_figure_keeps_budget_and_per_point_arrays_aligned():
+    """
+    Traces are subsampled proportionally and every per-point array uses the same indices.
+    """
+    big = np.arange(900)
+    small = np.arange(100)
+    figure = go.Figure([
+        go.Scatter3d(x=big, y=big * 2, z=big * 3, text=[str(i) for i in big], marker={'color': big}, name='big'),
+        go.Scatter3d(x=small, y=small, z=small, name='small'),
+    ]).to_plotly_json()
+
+    lod = decimate_figure(figure, max_points=100)
+    first, second = lod['data']
+
+    assert len(first['x']) == 90 and len(second['x']) == 10
+    assert np.array_equal(np.asarray(first['y']), np.asarray(first['x']) * 2)
+    assert [int(t) for t in first['text']] == list(first['x'])
+    assert np.array_equal(np.asarray(first['marker']['color']), np.asarray(first['x']))
+    assert first['name'] == 'big'
+    assert len(figure['data'][0]['x']) == 900
+
+def test_decimate_figure_leaves_small_figures_alone():
+    figure = go.Figure([go.Scatter3d(x=[1, 2], y=[1, 2], z=[1, 2])]).to_plotly_json()
+    assert decimate_figure(figure, max_points=100) is figure
+
+def test_calendar_counts_bins_days_into_monday_weeks():
+    """
+    Events are counted per day from the first Monday of the window; out-of-window and NaT dates are dropped.
+    """
+    dates = np.array(['2025-01-06', '2025-01-06', '2025-01-12', '2025-03-02', '2024-06-01', 'NaT'], dtype='datetime64[D]')
+    calendar = calendar_counts(dates, datetime.date(2025, 3, 2), 60)
+
+    # 2025-01-01 is a Wednesday, so the window starts on Monday 2025-01-06
+    assert calendar['date'][0] == '2025-01-06' and calendar['date'][-1] == '2025-03-02'
+    assert calendar['weekday'][0] == 0 and calendar['weekday'][-1] == 6
+    assert calendar['count'].tolist()[:7] == [2, 0, 0, 0, 0, 0, 1]
+    assert calendar['count'][-1] == 1 and calendar['count'].sum() == 4
+    assert calendar['week'][-1] == 8
+    assert calendar['month_text'] == ['January', 'February', 'March']
+    assert calendar_counts(dates, datetime.date(2025, 3, 2), 730)['month_text'][0] == 'Mar 2023'
+
+def test_binned_kde_matches_gaussian_kde():
+    """
+    The binned density agrees with scipy's gaussian_kde on the same evaluation points.
+    """
+    pay = np.random.default_rng(0).normal(140000, 30000, 5000)
+    x, density = binned_kde(pay, n_points=100)
+
+    assert np.allclose(x, np.linspace(pay.min(), pay.max(), 100))
+    expected = gaussian_kde(pay)(x)
+    assert np.abs(density - expected).max() < 1e-3 * expected.max()
+
+def test_binned_kde_handles_degenerate_input():
+    """
+    Constant, single and empty inputs return a density instead of raising.
+    """
+    x, density = binned_kde(np.array([90000.0, 90000.0, np.nan]))
+    assert len(x) == 100 and x.min() < 90000 < x.max()
+    assert np.isfinite(density).all() and density.max() > 0
+    assert len(binned_kde(np.array([120000.0]))[0]) == 100
+    assert len(binned_kde(np.array([]))[0]) == 0
+
+def test_histogram_bins_are_left_closed_and_sparse():
+    """
+    Values are counted in size-aligned, left-closed bins; empty bins are left out.
+    """
+    bins = histogram_bins(np.array([100000, 104999, 105000, 150000, np.nan]), 5000)
+    assert bins['x'].tolist() == [102500, 107500, 152500]
+    assert bins['count'].tolist() == [2, 1, 1]
+    assert len(histogram_bins(np.array([]), 5000)['x']) == 0
+
+def test_box_stats_match_raw_box_conventions():
+    """
+    Quartiles interpolate linearly, whiskers stop at the last point within 1.5 IQR, the rest are outliers.
+    """
+    values = np.array([1, 2, 3, 4, 5, 6, 7, 8, 30, np.nan])
+    stats = box_stats(values)
+    assert (stats['q1'], stats['median'], stats['q3']) == (3, 5, 7)
+    assert (stats['lowerfence'], stats['upperfence']) == (1, 8)
+    assert stats['outliers'].tolist() == [30]
+    assert box_stats(np.array([np.nan])) is None
@@ -0,0 +1,134 @@
+import pandas as pd
+import pyarrow as pa
+from apps import grid
+from apps.grid import apply_filter_model, get_rows, dataset_handle, resolve_dataset
+from data_utils.cache import LRUCache
+
+def make_frame():
+    return pd.DataFrame({
+        'application_id': ['1', '2', '3', '4'],
+        'application_date': pd.to_datetime(['2025-01-01', '2025-01-05', '2025-02-01', '2025-03-01']),
+        'company_name': ['Acme', 'Globex', 'Initech', None],
+        'pay_min': [100000, 120000, None, 90000],
+        'rejection': [True, False, None, True],
+        'role_desc': ['a', 'b', 'c', 'd'],
+    })
+
+def test_filter_model_uses_declared_column_filters():
+    """
+    Text, number and date filters from JOBcolumnDefs are applied; undeclared columns are ignored.
+    """
+    dff = make_frame()
+    filter_model = {
+        'company_name': {'filterType': 'text', 'type': 'contains', 'filter': 'e'},
+        'pay_min': {'filterType': 'number', 'type': 'greaterThanOrEqual', 'filter': 100000},
+        'role_desc': {'filterType': 'text', 'type': 'equals', 'filter': 'zzz'},
+    }
+    assert apply_filter_model(dff, filter_model)['application_id'].tolist() == ['1', '2']
+
+    date_model = {'application_date': {
+        'filterType': 'date',
+        'operator': 'OR',
+        'conditions': [
+            {'type': 'lessThan', 'dateFrom': '2025-01-02 00:00:00'},
+            {'type': 'equals', 'dateFrom': '2025-03-01 00:00:00'},
+        ],
+    }}
+    assert apply_filter_model(dff, date_model)['application_id'].tolist() == ['1', '4']
+
+    bool_model = {'rejection': {'filterType': 'number', 'type': 'equals', 'filter': 1}}
+    assert apply_filter_model(dff, bool_model)['application_id'].tolist() == ['1', '4']
+
+def test_get_rows_sorts_and_pages():
+    """
+    The response holds only the requested block and the total filtered row count.
+    """
+    request = {
+        'startRow': 1,
+        'endRow': 3,
+        'sortModel': [{'colId': 'pay_min', 'sort': 'desc'}],
+        'filterModel': {},
+    }
+    response = get_rows(make_frame(), request)
+
+    assert response['rowCount'] == 4
+    assert [row['application_id'] for row in response['rowData']] == ['1', '4']
+
+def test_get_rows_fetches_text_for_the_block_only():
+    requested = []
+    def load_text(ids):
+        requested.extend(ids)
+        return pd.DataFrame({'requirements': [f'text {i}' for i in ids]}, index=pd.Index(ids, name='application_id'))
+    response = get_rows(make_frame(), {'startRow': 2, 'endRow': 4}, load_text=load_text)
+
+    assert requested == ['3', '4']
+    assert [row['requirements'] for row in response['rowData']] == ['text 3', 'text 4']
+    assert response['rowCount'] == 4
+
+def test_dataset_handles_share_one_filtered_frame(monkeypatch):
+    """
+    Equal filter states resolve to the same cached frame; a new data version gets a new key.
+    """
+    monkeypatch.setattr(grid, 'DATASETS', LRUCache(maxsize=4))
+    loads = []
+    def load():
+        loads.append(1)
+        return make_frame()
+
+    filter_model = {'company_name': {'filterType': 'text', 'type': 'contains', 'filter': 'o'}}
+    first = dataset_handle(filter_model, 'v1')
+    same = dataset_handle({k: dict(v) for k, v in filter_model.items()}, 'v1')
+
+    assert first['key'] == same['key']
+    assert dataset_handle(filter_model, 'v2')['key'] != first['key']
+    assert resolve_dataset(first, load) is resolve_dataset(same, load)
+    assert resolve_dataset(first, load)['application_id'].tolist() == ['2']
+    assert len(loads) == 1
+
+def test_search_filters_and_ranks_rows(monkeypatch):
+    """
+    A search in the handle keeps only matching rows, in the index's rank order.
+    """
+    monkeypatch.setattr(grid, 'DATASETS', LRUCache(maxsize=4))
+    class FakeIndex:
+        def search(self, query):
+            return ['3', '1', '9']
+    monkeypatch.setattr(grid, 'term_index', FakeIndex())
+
+    handle = dataset_handle({}, 'v1', search=' python ')
+    assert handle['search'] == 'python'
+    assert handle['key'] != dataset_handle({}, 'v1')['key']
+    assert resolve_dataset(handle, make_frame)['application_id'].tolist() == ['3', '1']
+    assert resolve_dataset(dataset_handle({}, 'v1', search=''), make_frame)['application_id'].tolist() == ['1', '2', '3', '4']
+
+def test_search_on_noise_words_and_stopwords(monkeypatch):
+    """
+    Word-cloud noise words such as "data" are searched; a query of only stopwords does not filter.
+    """
+    queries = []
+    class FakeIndex:
+        def search(self, query):
+            queries.append(query)
+            return ['2']
+    monkeypatch.setattr(grid, 'term_index', FakeIndex())
+
+    assert grid.apply_search(make_frame(), 'data')['application_id'].tolist() == ['2']
+    assert grid.apply_search(make_frame(), 'the')['application_id'].tolist() == ['1', '2', '3', '4']
+    assert queries == ['data']
+
+def test_filters_and_sorts_work_on_typed_columns():
+    """
+    Arrow list and categorical columns are filtered and sorted by their text.
+    """
+    dff = pd.DataFrame({
+        'application_id': ['1', '2', '3'],
+        'office_participation': pd.Series(['Remote', None, 'Hybrid'], dtype='category'),
+        'core_skills': pd.Series([['sql'], ['python', 'dbt'], None], dtype=pd.ArrowDtype(pa.list_(pa.string()))),
+    })
+    skills = {'core_skills': {'filterType': 'text', 'type': 'contains', 'filter': 'python, d'}}
+    assert apply_filter_model(dff, skills)['application_id'].tolist() == ['2']
+    blank = {'office_participation': {'filterType': 'text', 'type': 'blank'}}
+    assert apply_filter_model(dff, blank)['application_id'].tolist() == ['2']
+
+    response = get_rows(dff, {'startRow': 0, 'endRow': 3, 'sortModel': [{'colId': 'core_skills', 'sort': 'asc'}]})
+    assert [row['application_id'] for row in response['rowData']] == ['2', '1', '3']
@@ -0,0 +1,72 @@
+import time
+import pytest
+from data_utils import repository, write_queue
+from data_utils.repository import DuckDBApplications, get_repository, skill_list
+from tests.test_upload_to_bq import make_application
+
+pytest.importorskip("duckdb")
+
+
+def test_duckdb_backend_round_trips_and_persists(tmp_path):
+    """
+    Upserts keep created_at, queries filter by updated_at and id, and writes survive a reload of the file.
+    """
+    path = str(tmp_path / "applications.parquet")
+    local = DuckDBApplications(path)
+    local.upsert([make_application('1', 'Acme', core_skills=['python']),
+                  make_application('2', 'Globex', requirements='SQL and dbt')])
+    first = local.query_rows().set_index('application_id')
+    assert 'requirements' not in first.columns
+
+    time.sleep(0.01)
+    local.upsert([make_application('1', 'Acme Corp', core_skills=['sql'])])
+    rows = local.query_rows().set_index('application_id')
+    assert rows.loc['1', 'company_name'] == 'Acme Corp'
+    assert rows.loc['1', 'created_at'] == first.loc['1', 'created_at']
+    assert local.query_rows(since=first['updated_at'].max())['application_id'].tolist() == ['1']
+    assert local.query_rows(application_ids=['2'])['company_name'].tolist() == ['Globex']
+    assert local.query_text(['2'])['requirements'].tolist() == ['SQL and dbt']
+    assert local.query_application('1').core_skills == ['sql']
+    assert local.query_application('9') is None
+
+    local.delete(['2'])
+    reloaded = DuckDBApplications(path)
+    assert reloaded.query_ids() == {'1'}
+    assert reloaded.query_application('1').company_name == 'Acme Corp'
+
+def test_local_writes_apply_at_once_and_queue_a_sync(tmp_path, monkeypatch):
+    local = DuckDBApplications(str(tmp_path / "applications.parquet"))
+    queue = write_queue.WriteQueue(str(tmp_path / "writes.sqlite"), upsert=None, delete=None, on_commit=None)
+    monkeypatch.setattr(write_queue, 'get_repository', lambda: local)
+    monkeypatch.setattr(write_queue, 'get_write_queue', lambda: queue)
+    monkeypatch.setattr(write_queue, '_refresh_caches', lambda: None)
+
+    seq = write_queue.save_application(make_application('1', 'Acme'))
+    assert local.query_ids() == {'1'}
+    assert not queue.is_committed(seq)
+
+    monkeypatch.setattr(write_queue, 'APPLICATIONS_SYNC', 'none')
+    assert write_queue.delete_application('1') is None
+    assert local.query_ids() == set()
+    # The local delete supersedes the upsert queued before sync was turned off
+    assert queue.pending() == {}
+
+def test_next_id_counts_stored_and_queued_ids(tmp_path, monkeypatch):
+    local = DuckDBApplications(str(tmp_path / "applications.parquet"))
+    queue = write_queue.WriteQueue(str(tmp_path / "writes.sqlite"), upsert=None, delete=None, on_commit=None)
+    monkeypatch.setattr(write_queue, 'get_repository', lambda: local)
+    monkeypatch.setattr(write_queue, 'get_write_queue', lambda: queue)
+    assert write_queue.next_application_id() == '1'
+
+    local.upsert([make_application('9', 'Acme'), make_application('draft', 'Globex')])
+    assert write_queue.next_application_id() == '10'
+    queue.enqueue_upsert(make_application('12', 'Initech'))
+    assert write_queue.next_application_id() == '13'
+
+def test_backend_is_chosen_by_name():
+    assert isinstance(get_repository('duckdb'), DuckDBApplications)
+    assert get_repository('duckdb') is get_repository('duckdb')
+    with pytest.raises(ValueError):
+        get_repository('sqlite')
+    assert skill_list({'list': [{'element': 'python'}]}) == skill_list(['python']) == ['python']
+    assert repository.REPOSITORIES['bigquery'] is repository.BigQueryApplications
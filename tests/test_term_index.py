@@ -0,0 +1,97 @@
+import pandas as pd
+from data_utils import term_index
+from data_utils.term_index import TermIndex
+
+def test_term_index_updates_incrementally_and_persists(monkeypatch, tmp_path):
+    """
+    Rows are tokenized once per (application_id, updated_at), persisted, and dropped for deleted applications.
+    """
+    table = pd.DataFrame({
+        'application_id': ['1', '2'],
+        'updated_at': pd.to_datetime(['2025-01-01', '2025-01-01'], utc=True),
+    })
+    text = {
+        '1': {'role_desc': 'analyst', 'requirements': 'python sql'},
+        '2': {'role_desc': 'engineer', 'requirements': 'sql spark sql'},
+    }
+    fetched = []
+    def fake_text(ids):
+        fetched.extend(ids)
+        return pd.DataFrame.from_dict({i: text[i] for i in ids}, orient='index', columns=['role_desc', 'requirements'])
+
+    monkeypatch.setattr(term_index, 'load_applications', lambda: table)
+    monkeypatch.setattr(term_index, 'applications_version', lambda: str(table['updated_at'].max()) + str(len(table)))
+    monkeypatch.setattr(term_index, 'load_application_text', fake_text)
+    monkeypatch.setattr(term_index, 'tokenize', lambda values, stopwords: values.str.split())
+    monkeypatch.setattr(term_index, 'search_keywords', lambda query: query.split())
+    path = str(tmp_path / 'terms.npz')
+
+    index = TermIndex(['role_desc', 'requirements'], path)
+    assert index.frequencies(['1', '2'], fields=['requirements']) == {'python': 1, 'sql': 3, 'spark': 1}
+    assert index.frequencies(['2']) == {'engineer': 1, 'sql': 2, 'spark': 1}
+    assert index.top_terms(['1', '2'], k=2) == [('sql', 3), ('analyst', 1)]
+    assert index.term_frequency('sql').to_dict() == {'1': 1, '2': 2}
+    assert index.search('sql spark') == ['2', '1']
+    assert index.search('python') == ['1']
+    assert index.search('rust') == []
+    assert fetched == ['1', '2']
+
+    # A new worker reads the persisted index; only the edited application is re-tokenized
+    table = pd.DataFrame({
+        'application_id': ['2'],
+        'updated_at': pd.to_datetime(['2025-02-01'], utc=True),
+    })
+    text['2'] = {'role_desc': 'engineer', 'requirements': 'rust'}
+    restarted = TermIndex(['role_desc', 'requirements'], path)
+    assert restarted.frequencies(['1', '2']) == {'engineer': 1, 'rust': 1}
+    assert restarted.search('sql') == []
+    assert restarted.search('rust engineer') == ['2']
+    assert fetched == ['1', '2', '2']
+    assert restarted.ids == ['2']
+
+def test_bm25_prefers_rare_terms_and_short_documents(monkeypatch):
+    """
+    A rare keyword outweighs a common one, and equal counts score higher in shorter documents.
+    """
+    table = pd.DataFrame({
+        'application_id': ['1', '2', '3'],
+        'updated_at': pd.to_datetime(['2025-01-01'] * 3, utc=True),
+        'company_name': ['acme', 'globex', 'initech'],
+    })
+    text = {
+        '1': 'python sql sql',
+        '2': 'python spark',
+        '3': 'python sql tableau looker excel',
+    }
+    monkeypatch.setattr(term_index, 'load_applications', lambda: table)
+    monkeypatch.setattr(term_index, 'applications_version', lambda: 'v1')
+    monkeypatch.setattr(term_index, 'load_application_text', lambda ids: pd.DataFrame(
+        {'requirements': [text[i] for i in ids]}, index=pd.Index(ids, name='application_id')
+    ))
+    monkeypatch.setattr(term_index, 'tokenize', lambda values, stopwords: values.str.split())
+    monkeypatch.setattr(term_index, 'search_keywords', lambda query: query.split())
+
+    index = TermIndex(['company_name', 'requirements'])
+    scores = index.bm25('spark sql')
+    assert scores.index.tolist() == ['2', '1', '3']
+    assert index.search('python') == ['2', '1', '3']
+    assert index.search('globex') == ['2']
+
+def test_hidden_terms_are_searchable_but_not_counted(monkeypatch):
+    table = pd.DataFrame({
+        'application_id': ['1', '2'],
+        'updated_at': pd.to_datetime(['2025-01-01'] * 2, utc=True),
+    })
+    text = {'1': 'data python', '2': 'data data sql'}
+    monkeypatch.setattr(term_index, 'load_applications', lambda: table)
+    monkeypatch.setattr(term_index, 'applications_version', lambda: 'v1')
+    monkeypatch.setattr(term_index, 'load_application_text', lambda ids: pd.DataFrame(
+        {'requirements': [text[i] for i in ids]}, index=pd.Index(ids, name='application_id')
+    ))
+    monkeypatch.setattr(term_index, 'tokenize', lambda values, stopwords: values.str.split())
+    monkeypatch.setattr(term_index, 'search_keywords', lambda query: query.split())
+
+    index = TermIndex(['requirements'], hidden_terms=['data'])
+    assert index.frequencies(['1', '2']) == {'python': 1, 'sql': 1}
+    assert index.top_terms(['1', '2'], k=1) == [('python', 1)]
+    assert index.search('data') == ['2', '1']
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+from data_utils import text
+
+SENTENCES = [
+    "5+ years of experience with Python, SQL and dbt.",
+    "Strong communication skills; you'll partner with product (and engineering) teams.",
+    "Experience building ML models in production, e.g. forecasting or ranking.",
+    "Familiarity with Spark/Databricks, Airflow & cloud data warehouses.",
+    "You can't be afraid of ambiguity -- we're a small team!",
+    "Bachelor's or Master's degree in Statistics, CS or a related field.",
+    "Comfortable with A/B testing, causal inference and experimentation.",
+    "Nice to have: \"Looker\" or Tableau dashboards, plus 1,000+ hours of stakeholder work?",
+    "Work with cross-functional teams on 'Looker' dashboards, node.js and C++ etc. services.",
+    "We're hiring: 10:30 standups, $120,000 salary & 401k benefits!",
+    "Users' feedback... is key -- don't ignore it; cannot stress enough.",
+    "I’m sure the bachelor’s degree isn’t required, you’ll see.",
+    "Tools: Python3, R, [Spark], {Kafka}, <Flink> and Résumé parsing.",
+]
+
+def test_regex_tokenizer_drops_punctuated_words_and_stopwords():
+    """
+    Words joined by inner punctuation are dropped whole, like NLTK's tokens failing the alphanumeric filter.
+    """
+    texts = pd.Series([
+        "5+ years of Python, SQL and dbt, e.g. A/B tests. Strong communication skills!",
+        "You can't be afraid of ambiguity -- we're shipping node.js (fast).",
+        "Bachelor's degree in CS; 1,000+ hours of Tableau",
+        "",
+        None,
+    ], index=[10, 11, 12, 13, 14])
+    assert text.regex_tokenize(texts).to_dict() == {
+        10: ['python', 'sql', 'dbt', 'tests', 'communication'],
+        11: ['ca', 'afraid', 'ambiguity', 'shipping', 'fast'],
+        12: ['bachelor', 'degree', 'cs', 'hours', 'tableau'],
+        13: [],
+        14: [],
+    }
+    assert text.preprocess_text("Python, SQL and Spark.") == ['python', 'sql', 'spark']
+
+def test_regex_tokenizer_matches_nltk_word_tokenizer_per_sentence():
+    """
+    Sentence by sentence the regex backend keeps exactly NLTK's alphanumeric tokens.
+
+    NLTKWordTokenizer is what `word_tokenize` runs on each sentence; it needs no corpus download.
+    """
+    tokenize = pytest.importorskip("nltk.tokenize").NLTKWordTokenizer().tokenize
+    expected = [
+        [word for word in tokenize(sentence.lower()) if word.isalnum() and word not in text.STOPWORDS]
+        for sentence in SENTENCES
+    ]
+    assert text.regex_tokenize(pd.Series(SENTENCES)).tolist() == expected
+    assert text.regex_tokenize(pd.Series([' '.join(SENTENCES)])).iloc[0] == sum(expected, [])
+
+def test_search_keywords_keep_word_cloud_noise_words():
+    assert text.search_keywords("The data product team") == ['data', 'product', 'team']
+    assert text.preprocess_text("The data product team") == []
+    assert text.search_keywords("the and of") == []
+
+def test_regex_tokenizer_agrees_with_word_tokenize():
+    """
+    Whole documents agree with `word_tokenize`, sentence splitting included.
+    Needs NLTK's punkt_tab model; skipped when it is not installed.
+    """
+    nltk = pytest.importorskip("nltk")
+    try:
+        nltk.data.find('tokenizers/punkt_tab/english/')
+    except LookupError:
+        pytest.skip("punkt_tab is not installed")
+    texts = pd.Series([' '.join(SENTENCES), ' '.join(SENTENCES[::-1])])
+    assert text.regex_tokenize(texts).tolist() == text.nltk_tokenize(texts).tolist()
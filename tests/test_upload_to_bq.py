@@ -0,0 +1,143 @@
+import re
+import json
+import time
+import threading
+from google.cloud.exceptions import NotFound
+from data_utils import upload_to_bq
+from data_utils.datamodel import Application
+from data_utils.upload_to_bq import upsert_applications_to_bigQuery_table, upsert_data_to_bigQuery_table
+
+class FakeJob:
+    errors = None
+
+    def __init__(self, num_dml_affected_rows=0):
+        self.num_dml_affected_rows = num_dml_affected_rows
+
+    def result(self):
+        return self
+
+
+class FakeBigQuery:
+    """
+    In-memory stand-in for the BigQuery calls an upsert makes.
+
+    Tables are lists of rows keyed by table id. Every call yields the thread so
+    concurrent upserts interleave between steps, like separate workers would.
+    """
+    def __init__(self):
+        self.tables = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def _step(self, call):
+        with self.lock:
+            self.calls.append(call)
+        time.sleep(0.001)
+
+    def get_table(self, table_id):
+        self._step('get_table')
+        if table_id not in self.tables:
+            raise NotFound(table_id)
+
+    def create_table(self, table, exists_ok=False):
+        self._step('create_table')
+        table_id = f"{table.project}.{table.dataset_id}.{table.table_id}"
+        with self.lock:
+            self.tables.setdefault(table_id, [])
+        return table
+
+    def load_table_from_file(self, source, table_id, job_config=None):
+        self._step('load')
+        rows = [json.loads(line) for line in source.read().splitlines()]
+        with self.lock:
+            self.tables[table_id].extend(rows)
+        return FakeJob()
+
+    def query(self, query):
+        self._step('merge')
+        target, staging = re.findall(r"`([^`]+)`", query)
+        with self.lock:
+            merged = {row['application_id']: row for row in self.tables[target]}
+            for row in self.tables[staging]:
+                merged[row['application_id']] = {**row, 'created_at': merged.get(row['application_id'], row)['created_at']}
+            self.tables[target] = list(merged.values())
+        return FakeJob(len(self.tables[staging]))
+
+    def delete_table(self, table_id, not_found_ok=False):
+        self._step('delete')
+        with self.lock:
+            self.tables.pop(table_id, None)
+
+
+def make_application(application_id, company_name, **fields):
+    flags = {name: False for name, field in Application.model_fields.items()
+             if field.is_required() and field.annotation is bool}
+    return Application(application_id=application_id, company_name=company_name, job_title='Data Scientist',
+                       application_source='LinkedIn', **{**flags, **fields})
+
+
+def test_batch_upsert_uses_one_load_and_one_merge():
+    """
+    A batch is deduplicated by application_id (last wins) and written with one load job and one MERGE.
+    """
+    client = FakeBigQuery()
+    client.tables[upload_to_bq.MAIN_TABLE_ID] = []
+    applications = [
+        make_application('1', 'Acme', core_skills=['python']),
+        make_application('2', 'Globex'),
+        make_application('1', 'Acme Corp', core_skills=['sql']),
+    ]
+
+    job = upsert_applications_to_bigQuery_table(iter(applications), client=client)
+
+    assert job.num_dml_affected_rows == 2
+    assert client.calls == ['get_table', 'create_table', 'load', 'merge', 'delete']
+    rows = client.tables[upload_to_bq.MAIN_TABLE_ID]
+    assert [row['application_id'] for row in rows] == ['1', '2']
+    assert rows[0]['company_name'] == 'Acme Corp'
+    assert rows[0]['core_skills'] == {'list': [{'element': 'sql'}]}
+    assert list(client.tables) == [upload_to_bq.MAIN_TABLE_ID]
+
+def test_empty_batch_makes_no_calls():
+    client = FakeBigQuery()
+    assert upsert_applications_to_bigQuery_table([], client=client) is None
+    assert client.calls == []
+
+def test_concurrent_upserts_do_not_share_staging_tables():
+    """
+    Many simultaneous upserts each merge exactly their own row and leave no staging table behind.
+    """
+    client = FakeBigQuery()
+    client.tables[upload_to_bq.MAIN_TABLE_ID] = []
+    errors = []
+    def submit(i):
+        try:
+            upsert_data_to_bigQuery_table(make_application(str(i), f"Company {i}"), client=client)
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(25)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    rows = client.tables[upload_to_bq.MAIN_TABLE_ID]
+    assert sorted(int(row['application_id']) for row in rows) == list(range(25))
+    assert all(row['company_name'] == f"Company {row['application_id']}" for row in rows)
+    assert list(client.tables) == [upload_to_bq.MAIN_TABLE_ID]
+    assert client.calls.count('merge') == 25
+
+def test_staging_table_is_deleted_when_the_merge_fails():
+    client = FakeBigQuery()
+    client.tables[upload_to_bq.MAIN_TABLE_ID] = []
+    def failing_query(query):
+        raise RuntimeError("merge failed")
+    client.query = failing_query
+
+    try:
+        upsert_data_to_bigQuery_table(make_application('1', 'Acme'), client=client)
+    except RuntimeError:
+        pass
+    assert list(client.tables) == [upload_to_bq.MAIN_TABLE_ID]
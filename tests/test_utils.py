@@ -0,0 +1,110 @@
+import threading
+from apps import utils
+
+def test_client_registry_creates_each_client_once(monkeypatch):
+    """
+    Concurrent lookups of the same key share one lazily created client.
+    """
+    monkeypatch.setattr(utils, '_clients', {})
+    created = []
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(utils._get_client('bq', factory))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(created) == 1
+    assert all(client is created[0] for client in results)
+    assert utils._get_client('storage', factory) is not created[0]
+
+def test_local_secrets_backend_reads_env_then_file(monkeypatch, tmp_path):
+    """
+    The local backend serves secrets from environment variables first, then SECRETS_FILE.
+    """
+    secrets_file = tmp_path / "secrets.json"
+    secrets_file.write_text('{"BUCKET_NAME": "file-bucket", "VALID_USERNAME_PASSWORD_PAIRS": {"me": "pw"}}')
+    monkeypatch.setattr(utils, 'SECRETS_FILE', str(secrets_file))
+    monkeypatch.setenv('BUCKET_NAME', 'env-bucket')
+    monkeypatch.setattr(utils, 'secrets_provider', utils.SecretsProvider(backend='local'))
+
+    utils.prefetch_secrets('project')
+
+    assert utils.access_secrets('project', 'BUCKET_NAME', 'latest') == 'env-bucket'
+    assert utils.access_secrets('project', 'VALID_USERNAME_PASSWORD_PAIRS', 'latest', json_type=True) == {'me': 'pw'}
+
+def test_secrets_are_cached_until_refresh(monkeypatch):
+    """
+    Cached payloads are reused within the refresh interval and kept if a refresh fails.
+    """
+    provider = utils.SecretsProvider(backend='local', refresh=60)
+    monkeypatch.setenv('BUCKET_NAME', 'first')
+    assert provider.get('project', 'BUCKET_NAME') == 'first'
+    monkeypatch.setenv('BUCKET_NAME', 'second')
+    assert provider.get('project', 'BUCKET_NAME') == 'first'
+
+    provider.refresh = 0
+    assert provider.get('project', 'BUCKET_NAME') == 'second'
+    monkeypatch.delenv('BUCKET_NAME')
+    assert provider.get('project', 'BUCKET_NAME') == 'second'
+
+def test_prefetch_skips_fresh_secrets(monkeypatch):
+    provider = utils.SecretsProvider(backend='local', refresh=60)
+    fetched = []
+    monkeypatch.setattr(provider, '_fetch_local', lambda *key: fetched.append(key[1]) or key[1].lower())
+    provider.get('project', 'BUCKET_NAME')
+    provider.prefetch('project', ('BUCKET_NAME', 'OTHER'))
+    assert fetched == ['BUCKET_NAME', 'OTHER']
+
+    provider.refresh = 0
+    provider.prefetch('project', ('BUCKET_NAME',))
+    assert fetched == ['BUCKET_NAME', 'OTHER', 'BUCKET_NAME']
+
+class FakeBlob:
+    def __init__(self, store, name):
+        self.store, self.name = store, name
+        self.generation, self.etag = store['generation'], f"etag-{store['generation']}"
+
+    def download_as_bytes(self, if_generation_match=None):
+        self.store['downloads'] += 1
+        return self.store['data']
+
+class FakeBucket:
+    def __init__(self, store):
+        self.store = store
+
+    def get_blob(self, name):
+        self.store['metadata_calls'] += 1
+        return FakeBlob(self.store, name)
+
+class FakeStorageClient:
+    def __init__(self, store):
+        self.store = store
+
+    def bucket(self, name):
+        return FakeBucket(self.store)
+
+def test_blob_cache_skips_network_when_fresh_and_revalidates_by_generation(monkeypatch, tmp_path):
+    """
+    Fresh cached blobs are served from disk; stale ones are only downloaded again if the generation changed.
+    """
+    store = {'data': b'v1', 'generation': 1, 'downloads': 0, 'metadata_calls': 0}
+    monkeypatch.setattr(utils, 'get_storage_client', lambda: FakeStorageClient(store))
+    monkeypatch.setattr(utils, 'BLOB_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(utils, 'BLOB_CACHE_MAX_AGE', 3600)
+
+    utils.prefetch_blobs('bucket', ('a.json', 'b.json'))
+    assert utils.read_blob_bytes('bucket', 'a.json') == b'v1'
+    assert store['downloads'] == 2 and store['metadata_calls'] == 2
+
+    monkeypatch.setattr(utils, 'BLOB_CACHE_MAX_AGE', 0)
+    assert utils.read_blob_bytes('bucket', 'a.json') == b'v1'
+    assert store['downloads'] == 2 and store['metadata_calls'] == 3
+
+    store.update(data=b'v2', generation=2)
+    assert utils.read_blob_bytes('bucket', 'a.json') == b'v2'
+    assert store['downloads'] == 3
@@ -0,0 +1,80 @@
+import json
+import base64
+from collections import Counter
+import pandas as pd
+from flask import Flask
+from apps import word_cloud
+from apps.word_cloud import wordcloud_image, wordcloud_url, register_wordcloud_route
+from data_utils.cache import LRUCache
+
+def fake_cache(monkeypatch):
+    renders = []
+    monkeypatch.setattr(word_cloud, 'IMAGES', LRUCache(maxsize=4))
+    monkeypatch.setattr(word_cloud, 'render_png', lambda top: renders.append(top) or b'png:' + json.dumps(top).encode())
+    return renders
+
+def test_equal_top_words_render_once(monkeypatch):
+    """
+    Frequencies with the same top-N words share a key and are rendered once.
+    """
+    renders = fake_cache(monkeypatch)
+    monkeypatch.setattr(word_cloud, 'TOP_WORDS', 2)
+
+    key, png = wordcloud_image(Counter({'python': 5, 'sql': 3, 'excel': 1}))
+    same_key, same_png = wordcloud_image(Counter({'python': 5, 'sql': 3, 'r': 2}))
+
+    assert key == same_key and png is same_png
+    assert len(renders) == 1
+    assert wordcloud_image(Counter({'python': 5, 'sql': 4}))[0] != key
+
+def test_route_serves_cached_image_with_etag(monkeypatch):
+    """
+    The image URL returns the PNG with an ETag, and a matching If-None-Match gets a 304.
+    """
+    fake_cache(monkeypatch)
+    server = Flask(__name__)
+    register_wordcloud_route(server)
+    client = server.test_client()
+
+    url = wordcloud_url(Counter({'python': 2}), {'filterModel': {}})
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data.startswith(b'png:')
+
+    etag = response.headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+def test_route_rebuilds_missing_image_from_filter_model(monkeypatch):
+    """
+    An image this worker does not hold is rebuilt from the filter model in the URL.
+    """
+    fake_cache(monkeypatch)
+    server = Flask(__name__)
+    register_wordcloud_route(server)
+    client = server.test_client()
+
+    filter_model = {'company_name': {'filterType': 'text', 'type': 'equals', 'filter': 'acme'}}
+    url = wordcloud_url(Counter({'python': 2}), {'filterModel': filter_model})
+    word_cloud.IMAGES.clear()
+
+    frame = pd.DataFrame({'application_id': ['1', '2'], 'company_name': ['Acme', 'Globex']})
+    requested = []
+    class FakeIndex:
+        def frequencies(self, ids, fields=None):
+            requested.append(ids)
+            return Counter({'python': 2})
+    monkeypatch.setattr(word_cloud, 'load_applications', lambda: frame)
+    monkeypatch.setattr(word_cloud, 'term_index', FakeIndex())
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'].startswith('public')
+    assert requested == [['1']]
+
+    key = url.split('/')[-1].split('.png')[0]
+    assert client.get(f"/wordcloud/{key}.png").status_code == 200
+    word_cloud.IMAGES.clear()
+    assert client.get(f"/wordcloud/{key}.png").status_code == 404
+    bad = base64.urlsafe_b64encode(b'[1]').decode()
+    assert client.get(f"/wordcloud/{key}.png?dataset={bad}").status_code == 400
@@ -0,0 +1,138 @@
+import time
+import threading
+from contextlib import closing
+import pytest
+from data_utils import write_queue as write_queue_module
+from data_utils.write_queue import WriteQueue
+from tests.test_upload_to_bq import make_application
+
+
+class FakeTarget:
+    """
+    Records the batches a queue writes, optionally failing the first few flushes.
+    """
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.upserts = []
+        self.deletes = []
+        self.commits = 0
+
+    def upsert(self, applications):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("BigQuery unavailable")
+        self.upserts.append([(app.application_id, app.company_name) for app in applications])
+
+    def delete(self, application_ids):
+        self.deletes.append(list(application_ids))
+
+    def committed(self):
+        self.commits += 1
+
+
+def make_queue(tmp_path, target):
+    return WriteQueue(str(tmp_path / "writes.sqlite"), upsert=target.upsert, delete=target.delete,
+                      on_commit=target.committed)
+
+
+def test_edits_to_one_application_are_coalesced(tmp_path):
+    """
+    Pending edits collapse to the latest one per application, in one upsert and one delete.
+    """
+    target = FakeTarget()
+    queue = make_queue(tmp_path, target)
+    queue.enqueue_upsert(make_application('1', 'Acme'))
+    queue.enqueue_upsert(make_application('2', 'Globex'))
+    last = queue.enqueue_upsert(make_application('1', 'Acme Corp'))
+    queue.enqueue_upsert(make_application('3', 'Initech'))
+    queue.enqueue_delete('3')
+
+    assert not queue.is_committed(last)
+    assert queue.pending()['1'].company_name == 'Acme Corp'
+    assert queue.pending()['3'] is None
+
+    assert queue.flush() == 5
+    assert target.upserts == [[('1', 'Acme Corp'), ('2', 'Globex')]]
+    assert target.deletes == [['3']]
+    assert target.commits == 1
+    assert queue.is_committed(last)
+    assert queue.pending() == {}
+    assert queue.status()['pending'] == 0 and queue.status()['committed'] == 5
+    assert queue.flush() == 0 and target.commits == 1
+
+def test_failed_flush_keeps_edits_across_restarts(tmp_path):
+    """
+    Edits stay logged when BigQuery fails and are committed by a later queue on the same file.
+    """
+    target = FakeTarget(failures=1)
+    queue = make_queue(tmp_path, target)
+    queue.enqueue_upsert(make_application('1', 'Acme'))
+
+    with pytest.raises(ConnectionError):
+        queue.flush()
+    assert queue.status()['pending'] == 1
+
+    restarted = make_queue(tmp_path, target)
+    assert restarted.flush() == 1
+    assert target.upserts == [[('1', 'Acme')]]
+    assert restarted.status()['pending'] == 0
+
+def test_flushes_sharing_a_log_do_not_overlap(tmp_path):
+    """
+    A second process's queue does not flush while the first holds its claim, so edits reach the target in order.
+    """
+    target = FakeTarget()
+    entered, release = threading.Event(), threading.Event()
+    def slow_upsert(applications):
+        entered.set()
+        release.wait(5)
+        target.upsert(applications)
+    first = WriteQueue(str(tmp_path / "writes.sqlite"), upsert=slow_upsert, delete=target.delete, on_commit=None)
+    second = make_queue(tmp_path, target)
+    first.enqueue_upsert(make_application('1', 'Acme'))
+
+    flushing = threading.Thread(target=first.flush)
+    flushing.start()
+    assert entered.wait(5)
+    second.enqueue_upsert(make_application('1', 'Acme Corp'))
+    assert second.flush() == 0
+    assert second.pending()['1'].company_name == 'Acme Corp'
+    assert second.status()['pending'] == 2
+
+    release.set()
+    flushing.join(5)
+    assert second.flush() == 1
+    assert target.upserts == [[('1', 'Acme')], [('1', 'Acme Corp')]]
+    assert second.status()['pending'] == 0
+
+def test_stale_claims_are_taken_over(tmp_path, monkeypatch):
+    """
+    Entries claimed by a flush that never finished are flushed by another queue after the claim timeout.
+    """
+    target = FakeTarget()
+    crashed = make_queue(tmp_path, target)
+    crashed.enqueue_upsert(make_application('1', 'Acme'))
+    with closing(crashed._connect()) as connection:
+        crashed._claim(connection)
+
+    survivor = make_queue(tmp_path, target)
+    assert survivor.flush() == 0
+    monkeypatch.setattr(write_queue_module, 'WRITE_QUEUE_CLAIM_TIMEOUT', -1)
+    assert survivor.flush() == 1
+    assert target.upserts == [[('1', 'Acme')]]
+
+def test_worker_retries_until_committed(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_queue_module, 'WRITE_QUEUE_DELAY', 0)
+    monkeypatch.setattr(write_queue_module, 'WRITE_QUEUE_RETRY', 0.01)
+    target = FakeTarget(failures=2)
+    queue = make_queue(tmp_path, target)
+    seq = queue.enqueue_upsert(make_application('1', 'Acme'))
+
+    queue.start()
+    deadline = time.monotonic() + 5
+    while not queue.is_committed(seq) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert queue.is_committed(seq)
+    assert target.upserts == [[('1', 'Acme')]]
+    assert queue.status()['failures'] == 0